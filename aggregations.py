@@ -0,0 +1,304 @@
+import base64
+import threading
+import warnings
+
+import numpy as np
+import pandas as pd
+from numpy.lib.stride_tricks import sliding_window_view
+
+from telemetry import align_lap
+
+STINT_COLUMNS = ['Driver', 'Stint', 'Compound', 'Lap', 'StintTotalLaps', 'Voltas']
+
+
+def build_stints(laps):
+    # um stint novo começa quando muda o piloto, o composto ou o Stint do fastf1 (pit sem troca de composto)
+    cols = [c for c in ('Driver', 'LapNumber', 'Compound', 'Stint') if c in laps.columns]
+    df = laps[cols].dropna(subset=['LapNumber'])
+    if df.empty:
+        return pd.DataFrame(columns=STINT_COLUMNS)
+    df = df.sort_values(['Driver', 'LapNumber'], kind='stable')
+    driver = df['Driver'].astype(str)
+    compound = df['Compound'].astype(object).fillna('UNKNOWN').astype(str)
+    new_stint = driver.ne(driver.shift()) | compound.ne(compound.shift())
+    if 'Stint' in df.columns:
+        fstint = df['Stint'].fillna(-1)
+        new_stint |= fstint.ne(fstint.shift())
+    stint_id = new_stint.cumsum()
+
+    stints = pd.DataFrame({
+        'Driver': driver, 'Compound': compound, 'LapNumber': df['LapNumber'], '_id': stint_id
+    }).groupby('_id', sort=False).agg(
+        Driver=('Driver', 'first'), Compound=('Compound', 'first'),
+        Lap=('LapNumber', 'min'), LastLap=('LapNumber', 'max'), Voltas=('LapNumber', 'size')
+    ).reset_index(drop=True)
+
+    same_driver_next = stints['Driver'].eq(stints['Driver'].shift(-1))
+    next_start = stints['Lap'].shift(-1)
+    # igual ao cálculo antigo: até o início do próximo stint, ou até a última volta no stint final
+    total = next_start.where(same_driver_next) - stints['Lap']
+    stints['StintTotalLaps'] = total.fillna(stints['LastLap'] - stints['Lap'] + 1).astype(int)
+    stints['Lap'] = stints['Lap'].astype(int)
+    stints['Stint'] = stints.groupby('Driver', sort=False).cumcount() + 1
+    return stints[STINT_COLUMNS]
+
+
+# representação compacta das voltas guardada no cache e no lap store: strings como category,
+# tempos como float32 em segundos (colunas *_s, no lugar dos timedelta64) e contadores como
+# inteiros pequenos. Ver "Memória por sessão" no readme.
+TIME_COLUMNS = ['LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'Time', 'LapStartTime', 'PitInTime', 'PitOutTime']
+CATEGORY_COLUMNS = ['Driver', 'DriverNumber', 'Team', 'Compound', 'TrackStatus']
+INT_COLUMNS = {'LapNumber': 'Int16', 'Stint': 'Int8', 'TyreLife': 'Int16', 'Position': 'Int8'}
+BOOL_COLUMNS = ['IsPersonalBest', 'FreshTyre', 'IsAccurate']
+
+
+def is_compact(laps):
+    return 'LapTime_s' in laps.columns and 'LapTime' not in laps.columns
+
+
+def compact_laps(laps):
+    if is_compact(laps):
+        return laps
+    cols = {}
+    for col in CATEGORY_COLUMNS:
+        if col in laps.columns:
+            cols[col] = laps[col].astype(object).astype('category')
+    for col, dtype in INT_COLUMNS.items():
+        if col in laps.columns:
+            cols[col] = pd.to_numeric(laps[col], errors='coerce').round().astype(dtype)
+    for col in BOOL_COLUMNS:
+        if col in laps.columns:
+            cols[col] = laps[col].fillna(False).astype(bool)
+    if 'Deleted' in laps.columns:
+        # None = mensagens da direção de prova não carregadas
+        cols['Deleted'] = laps['Deleted'].astype('boolean')
+    for col in TIME_COLUMNS:
+        if col in laps.columns:
+            cols[f'{col}_s'] = laps[col].dt.total_seconds().astype('float32')
+    return pd.DataFrame(cols).reset_index(drop=True)
+
+
+def _seconds(laps, col):
+    if f'{col}_s' in laps.columns:
+        return laps[f'{col}_s']
+    return laps[col].dt.total_seconds()
+
+
+def _plain(df):
+    # os resultados são pequenos; sem category/float32 o plotly express e o JSON se comportam como antes
+    for col in df.columns:
+        if isinstance(df[col].dtype, pd.CategoricalDtype):
+            df[col] = df[col].astype(object)
+        elif df[col].dtype == 'float32':
+            df[col] = df[col].astype('float64').round(3)
+    return df
+
+
+def best_laps_per_driver(laps, only_by_time=False):
+    # mesmas regras do Laps.pick_fastest(): só voltas marcadas como melhor pessoal (a menos de
+    # only_by_time) e, em caso de empate, a primeira volta registrada
+    lap_time = _seconds(laps, 'LapTime')
+    mask = lap_time.notna()
+    if not only_by_time:
+        mask &= laps['IsPersonalBest'] == True  # noqa: E712
+    best = pd.DataFrame(laps[mask]).assign(LapTime_s=lap_time[mask])
+    best = best.sort_values('LapTime_s', kind='stable').drop_duplicates('Driver')
+    return _plain(best.sort_values('Driver', kind='stable').reset_index(drop=True))
+
+
+def top_n_laps(laps, n=5):
+    lap_time = _seconds(laps, 'LapTime')
+    mask = lap_time.notna()
+    valid = pd.DataFrame(laps[mask]).assign(LapTime_s=lap_time[mask])
+    top = valid.sort_values('LapTime_s', kind='stable').groupby('Driver', sort=False, observed=True).head(n)
+    return _plain(top.reset_index(drop=True))
+
+
+def sector_bests(laps):
+    rows = []
+    for sector in ('Sector1Time', 'Sector2Time', 'Sector3Time'):
+        times = _seconds(laps, sector).reset_index(drop=True)
+        if times.notna().any():
+            pos = times.idxmin()
+            rows.append({'Sector': sector, 'Driver': laps['Driver'].iloc[pos], 'Time': float(times.iloc[pos])})
+        else:
+            rows.append({'Sector': sector, 'Driver': None, 'Time': None})
+    return pd.DataFrame(rows)
+
+
+def team_gaps(df, col='LapTime_s'):
+    teams = df.groupby('Team', observed=True)[col].mean().reset_index().sort_values(col, kind='stable')
+    teams['Gap_lider'] = teams[col] - teams[col].iloc[0]
+    return _plain(teams.reset_index(drop=True))
+
+
+# ritmo: janela (voltas, centrada) da mediana móvel e efeito do combustível por volta que ainda
+# falta (~0,03 s/kg com ~1,8 kg queimados por volta)
+PACE_WINDOW = 5
+FUEL_S_PER_LAP = 0.055
+PACE_SERIES = {'raw': (False, False), 'fuel': (True, False), 'tyre': (False, True), 'fuel_tyre': (True, True)}
+
+
+def tyre_degradation(laps, tempo, limpa):
+    # degradação por composto estimada na própria sessão: inclinação do tempo (já sem combustível)
+    # pela idade do pneu dentro de cada stint, somando todos os stints do composto
+    df = pd.DataFrame({
+        'Driver': laps['Driver'].astype(object), 'Stint': laps['Stint'].astype('float64'),
+        'Compound': laps['Compound'].astype(object), 'Idade': laps['TyreLife'].astype('float64'), 'Tempo': tempo
+    })[limpa].dropna()
+    if df.empty:
+        return {}
+    grupos = df.groupby(['Driver', 'Stint'], sort=False)
+    df['dIdade'] = df['Idade'] - grupos['Idade'].transform('mean')
+    df['dTempo'] = df['Tempo'] - grupos['Tempo'].transform('mean')
+    df['xy'] = df['dIdade'] * df['dTempo']
+    df['xx'] = df['dIdade'] ** 2
+    somas = df.groupby('Compound', sort=False)[['xy', 'xx']].sum()
+    slopes = (somas['xy'] / somas['xx'].where(somas['xx'] > 0)).fillna(0).clip(lower=0)
+    return {comp: round(float(slope), 4) for comp, slope in slopes.items()}
+
+
+def rolling_pace(laps, window=PACE_WINDOW):
+    # ritmo de todos os pilotos numa passada só: as voltas limpas (sem tempo nulo nem pit in/out)
+    # vão para uma matriz série x piloto x volta e a mediana móvel sai de um único nanmedian sobre
+    # sliding_window_view, para as quatro combinações de correção (combustível e pneu) de uma vez.
+    # Devolve um frame alinhado com laps: segundos a descontar (Fuel_s, Tyre_s) e as medianas; a
+    # degradação estimada por composto fica em attrs['tyre_slopes'].
+    n = len(laps)
+    tempo = _seconds(laps, 'LapTime').astype('float64').to_numpy()
+    volta = laps['LapNumber'].fillna(0).astype(int).to_numpy()
+    codes, _ = pd.factorize(laps['Driver'].astype(object))
+    limpa = (~np.isnan(tempo) & _seconds(laps, 'PitInTime').isna().to_numpy()
+             & _seconds(laps, 'PitOutTime').isna().to_numpy() & (codes >= 0) & (volta > 0))
+    fuel = FUEL_S_PER_LAP * (volta.max(initial=0) - volta)
+    slopes = tyre_degradation(laps, tempo - fuel, limpa)
+    idade = laps['TyreLife'].astype('float64').to_numpy()
+    slope = laps['Compound'].astype(object).map(slopes).astype('float64').to_numpy()
+    tyre = np.nan_to_num(slope * (idade - 1))
+    out = {'Fuel_s': fuel.astype('float32'), 'Tyre_s': tyre.astype('float32')}
+    if not limpa.any():
+        for nome in PACE_SERIES:
+            out[f'Median_{nome}'] = np.full(n, np.nan, dtype='float32')
+        return _pace_frame(out, laps.index, slopes)
+
+    base = np.where(limpa, tempo, np.nan)
+    series = np.stack([base - fuel * f - tyre * t for f, t in PACE_SERIES.values()])
+    matriz = np.full((len(PACE_SERIES), codes.max() + 1, volta.max() + 1), np.nan)
+    matriz[:, codes[limpa], volta[limpa]] = series[:, limpa]
+    meia = window // 2
+    janelas = sliding_window_view(np.pad(matriz, ((0, 0), (0, 0), (meia, meia)), constant_values=np.nan), window, axis=2)
+    with warnings.catch_warnings():
+        # janelas só com NaN (piloto fora da pista) viram NaN, que é o esperado
+        warnings.simplefilter('ignore', RuntimeWarning)
+        mediana = np.nanmedian(janelas, axis=3)
+    # com menos da metade da janela de voltas limpas a mediana fica em branco
+    mediana[(~np.isnan(janelas)).sum(axis=3) <= meia] = np.nan
+    por_volta = np.where(limpa, mediana[:, np.maximum(codes, 0), volta], np.nan)
+    for i, nome in enumerate(PACE_SERIES):
+        out[f'Median_{nome}'] = por_volta[i].astype('float32')
+    return _pace_frame(out, laps.index, slopes)
+
+
+def _pace_frame(out, index, slopes):
+    pace = pd.DataFrame(out, index=index)
+    pace.attrs['tyre_slopes'] = slopes
+    return pace
+
+
+def typed_array(values):
+    # mesmo formato dos arrays tipados do Plotly ({dtype, bdata}): float32 em base64, ~2/3 do
+    # tamanho da lista JSON e sem perder o NaN
+    return {'dtype': 'f4', 'bdata': base64.b64encode(np.asarray(values, dtype='<f4').tobytes()).decode('ascii')}
+
+
+def _seconds_list(series):
+    secs = series.astype('float64').round(3)
+    return secs.astype(object).where(secs.notna(), None).tolist()
+
+
+def lap_dataset(laps, pace=None):
+    # voltas da sessão em formato colunar compacto para os callbacks do navegador
+    # (assets/client_analyses.js): strings viram índices em listas de valores únicos
+    if pace is None:
+        pace = rolling_pace(laps)
+    driver_codes, drivers = pd.factorize(laps['Driver'].astype(object))
+    team_codes, teams = pd.factorize(laps['Team'].astype(object))
+    compound_codes, compounds = pd.factorize(laps['Compound'].astype(object).fillna('UNKNOWN'))
+    return {
+        'drivers': list(drivers), 'teams': list(teams), 'compounds': list(compounds),
+        'driver': driver_codes.tolist(), 'team': team_codes.tolist(), 'compound': compound_codes.tolist(),
+        'lap': laps['LapNumber'].fillna(0).astype(int).tolist(),
+        'time': _seconds_list(_seconds(laps, 'LapTime')),
+        's1': _seconds_list(_seconds(laps, 'Sector1Time')),
+        's2': _seconds_list(_seconds(laps, 'Sector2Time')),
+        's3': _seconds_list(_seconds(laps, 'Sector3Time')),
+        'pb': laps['IsPersonalBest'].fillna(False).astype(int).tolist(),
+        'pit': _seconds(laps, 'PitInTime').notna().astype(int).tolist(),
+        # ritmo: medianas móveis por volta, já calculadas para todos os pilotos; as correções o
+        # navegador refaz com os coeficientes (combustível por volta que falta, pneu por volta de uso)
+        'pace': {
+            'window': PACE_WINDOW, 'fuel_s_per_lap': FUEL_S_PER_LAP,
+            'last_lap': int(laps['LapNumber'].max()) if len(laps) else 0,
+            'tyre_s_per_lap': pace.attrs.get('tyre_slopes', {}),
+            'tyre_life': laps['TyreLife'].fillna(1).astype(int).tolist(),
+            'median': {nome: typed_array(pace[f'Median_{nome}']) for nome in PACE_SERIES}
+        }
+    }
+
+
+class SessionArtifacts:
+    # derivados de uma sessão carregada, calculados na primeira vez que alguma análise os pede e
+    # guardados junto com a sessão no cache (sessions.load_artifacts)
+    def __init__(self, session):
+        self._session = session
+        self._values = {}
+        # reentrante: um derivado pode depender de outro (best_laps usa laps)
+        self._lock = threading.RLock()
+
+    def _get(self, name, build):
+        with self._lock:
+            if name not in self._values:
+                self._values[name] = build()
+            return self._values[name]
+
+    @property
+    def laps(self):
+        return self._get('laps', lambda: compact_laps(self._session.laps))
+
+    @property
+    def sector_bests(self):
+        return self._get('sector_bests', lambda: sector_bests(self.laps))
+
+    @property
+    def best_laps(self):
+        return self._get('best_laps', lambda: best_laps_per_driver(self.laps))
+
+    @property
+    def stints(self):
+        return self._get('stints', lambda: build_stints(self.laps))
+
+    @property
+    def pace(self):
+        return self._get('pace', lambda: rolling_pace(self.laps))
+
+    @property
+    def dataset(self):
+        return self._get('dataset', lambda: lap_dataset(self.laps, self.pace))
+
+    def lap_trace(self, driver, lap_number):
+        # telemetria de uma volta já alinhada na grade de distância, guardada por (piloto, volta);
+        # só funciona com a sessão carregada com telemetria (PROFILE_TELEMETRY)
+        lap_number = int(lap_number)
+        return self._get(('trace', driver, lap_number), lambda: align_lap(self._session, driver, lap_number))
+
+    def filtered(self, compostos=None, pilotos=None):
+        # sem filtro devolve o próprio frame do cache (sem cópia); com filtro, só as linhas selecionadas
+        laps = self.laps
+        if not compostos and not pilotos:
+            return laps
+        mask = pd.Series(True, index=laps.index)
+        if compostos:
+            mask &= laps['Compound'].isin(compostos)
+        if pilotos:
+            mask &= laps['Driver'].isin(pilotos)
+        return laps[mask]
@@ -1,13 +1,34 @@
-import fastf1
+import time
+# início do boot do worker: create_app() mede o tempo de import + montagem do app a partir daqui
+BOOT_START = time.perf_counter()
+import json
+import logging
+import os
 import pandas as pd
 import dash
-from dash import dcc, html
-from dash.dependencies import Input, Output, State
+import flask
+from dash import Patch, dcc, html, no_update
+from dash.dependencies import ClientsideFunction, Input, Output, State
+import numpy as np
 import plotly.express as px
 import plotly.graph_objects as go
+import plotly.io as pio
+from plotly.subplots import make_subplots
+from plotly.utils import PlotlyJSONEncoder
 from datetime import datetime
+from aggregations import best_laps_per_driver, team_gaps, top_n_laps, PACE_WINDOW
+from figure_cache import figure_cache
+from jobs import job_queue, load_shared, save_shared
+from live import LIVE_FILE, LIVE_POLL_MS, get_live_session, is_clean
+from metrics import metrics_view, register_gauges, set_payload, stage, tag, traced
+from schedule import calendar_cached, get_season_calendar, session_is_final
+from season import pending_sessions, season_complete, team_pace_by_event, update_season
+from sessions import iter_load_sessions, load_artifacts, load_session, load_sessions, session_cache, session_key, PROFILE_LAPS, PROFILE_LAPS_RCM, PROFILE_TELEMETRY
+from telemetry import lttb
 
-fastf1.Cache.enable_cache('./fastf1_cache')
+log = logging.getLogger('f1analyst')
+# pré-carrega a última etapa antes de atender (ver warm.py); útil com gunicorn --preload
+WARM_ON_BOOT = os.environ.get('F1_WARM_ON_BOOT', '0') == '1'
 
 TEAM_COLORS = {
     "Red Bull Racing": "#3671C6", "Ferrari": "#F91536", "Mercedes": "#6CD3BF", "McLaren": "#FF8000",
@@ -24,171 +45,237 @@ ANALISES = [
     {"label": "🏁 Melhor Volta", "value": "bestlap"},
     {"label": "📊 Stints por Piloto", "value": "stint"},
     {"label": "🔥 Heatmap de Setores", "value": "heatmap"},
-    {"label": "📈 Ritmo entre 2 Pilotos", "value": "ritmo"},
+    {"label": "📈 Ritmo dos Pilotos", "value": "ritmo"},
+    {"label": "🏎️ Telemetria (Velocidade)", "value": "telemetria"},
     {"label": "🛠️ Janelas de Pitstop", "value": "pitwindow"},
     {"label": "🔮 Força das Equipes (Corrida)", "value": "power_race"},
-    {"label": "🔮 Força das Equipes (Qualify)", "value": "power_qualify"}
+    {"label": "🔮 Força das Equipes (Qualify)", "value": "power_qualify"},
+    {"label": "📉 Força das Equipes (Temporada)", "value": "season_trend"}
 ]
+ANALISE_PERFIL = {
+    "bestlap": PROFILE_LAPS_RCM, "stint": PROFILE_LAPS_RCM, "heatmap": PROFILE_LAPS_RCM, "ritmo": PROFILE_LAPS_RCM,
+    "pitwindow": PROFILE_LAPS, "power_race": PROFILE_LAPS, "power_qualify": PROFILE_LAPS_RCM,
+    "telemetria": PROFILE_TELEMETRY
+}
+# análises que o navegador redesenha ao mudar compostos/pilotos, sem voltar ao servidor
+ANALISES_CLIENTE = ["bestlap", "stint", "heatmap", "ritmo"]
+# análises sem seletor de sessão: sessão que decide se o resultado ainda pode mudar
+SESSAO_DA_ANALISE = {"power_race": "FP3", "power_qualify": "Q", "pitwindow": "R"}
+ANALISES_SEM_SESSAO = ["power_race", "power_qualify", "pitwindow", "season_trend"]
+# análises que, com as sessões fora do cache, rodam no job_queue em vez da thread da requisição
+ANALISES_EM_SEGUNDO_PLANO = {"power_race": ["FP1", "FP2", "FP3"], "power_qualify": ["Q"], "pitwindow": ["R"]}
+JOB_POLL_MS = 1000
+FIGURA_TTL_PARCIAL = 60
+# ritmo: sem pilotos filtrados entra o grid inteiro; as opções só mudam o desenho no navegador
+RITMO_OPCOES = [
+    {"label": "Mediana móvel", "value": "mediana"},
+    {"label": "Corrigir combustível", "value": "combustivel"},
+    {"label": "Corrigir pneu", "value": "pneu"}
+]
+RITMO_OPCOES_PADRAO = ["mediana"]
+# telemetria: sem pilotos filtrados compara os dois mais rápidos; com filtro, até este limite
+TELEMETRIA_MAX_PILOTOS = 4
+# um traço de barras de stint por composto, sempre nessa ordem, antes dos traços dos pilotos
+COMPOSTOS_AO_VIVO = list(TYRE_COLORS)
 SECTOR_ICONS = ["🏁", "🚩", "🔰"]
+CHART_HEIGHT = 530
 
-def get_available_gps_and_sessions(ano):
-    calendar = fastf1.get_event_schedule(ano)
-    agora = pd.Timestamp.now(tz='Europe/London')
-    gps_sessoes = []
-    for _, row in calendar.iterrows():
-        sessoes_disp = []
-        for i, sessao_nome in enumerate(['FP1', 'FP2', 'FP3', 'Q', 'R']):
-            dt_col = f'Session{i+1}Date'
-            if pd.isnull(row[dt_col]):
-                continue
-            end = row[dt_col] + pd.Timedelta(hours=2)
-            if end < agora:
-                sessoes_disp.append(sessao_nome)
-        if sessoes_disp:
-            gps_sessoes.append({'event': row['EventName'], 'sessions': sessoes_disp})
-    return gps_sessoes
+class AnaliseIndisponivel(Exception):
+    def __init__(self, info_box, titulo):
+        super().__init__(titulo)
+        self.info_box = info_box
+        self.titulo = titulo
 
 def get_gp_options(ano):
-    data = get_available_gps_and_sessions(ano)
-    return [{'label': item['event'], 'value': item['event']} for item in data]
+    return get_season_calendar(ano).gp_options()
 
 def get_session_options(ano, gp):
-    data = get_available_gps_and_sessions(ano)
-    for item in data:
-        if item['event'] == gp:
-            return [{'label': s, 'value': s} for s in item['sessions']]
-    return []
+    return get_season_calendar(ano).session_options(gp)
+
+def figure_key(ano, gp, sessao, composto, pilotos, analysis):
+    if analysis == "season_trend":
+        return (int(ano), None, "N/A", (), (), analysis)
+    if analysis in SESSAO_DA_ANALISE:
+        return (int(ano), gp, "N/A", (), (), analysis)
+    pilotos_key = tuple(sorted(set(pilotos or [])))
+    return (int(ano), gp, sessao, tuple(sorted(set(composto or []))), pilotos_key, analysis)
+
+def figure_ttl(ano, gp, sessao, analysis):
+    try:
+        if analysis == "season_trend":
+            return None if season_complete(ano) else FIGURA_TTL_PARCIAL
+        if session_is_final(ano, gp, SESSAO_DA_ANALISE.get(analysis, sessao)):
+            return None
+    except Exception:
+        pass
+    return FIGURA_TTL_PARCIAL
 
 def format_time(td):
     if pd.isnull(td):
         return "--"
     if isinstance(td, str):
         return td
-    total_ms = int(td.total_seconds() * 1000)
+    # aceita timedelta ou segundos (float) das voltas compactas
+    secs = td.total_seconds() if hasattr(td, 'total_seconds') else float(td)
+    total_ms = int(round(secs * 1000))
     s = total_ms // 1000
     ms = total_ms % 1000
     return f"{s}s{ms:03d}ms"
 
+def placeholder_figure(titulo="Selecione os filtros e clique em Buscar!"):
+    return px.bar(title=titulo, template="plotly_dark")
+
+def chart_card(fig):
+    return html.Div([
+        dcc.Graph(id='analysis-graph', figure=fig, style={'height': f'{CHART_HEIGHT}px', 'width': '100%'})
+    ], className="card-material", style={
+        'maxWidth': '980px', 'margin': '0 auto', 'padding': '16px 22px 14px 22px'
+    })
+
 external_stylesheets = [
     "https://fonts.googleapis.com/css?family=Roboto:400,500,700&display=swap"
 ]
-app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
-app.title = "F1 Analyst"
-
-app.layout = html.Div([
-    html.H1("🏁 F1 Analyst - Dashboard Completo",
-            style={'textAlign': 'center', 'marginBottom': 10, 'color': '#f7fafc', 'fontFamily': 'Roboto, sans-serif'}),
-    html.Div([
-        dcc.Dropdown(ANOS, None, id='ano-dropdown', placeholder="Ano", style={'width': '8rem'}),
-        dcc.Dropdown([], None, id='gp-dropdown', placeholder="GP", style={'width': '14rem'}),
-        dcc.Dropdown([], None, id='sessao-dropdown', placeholder="Sessão", style={'width': '9rem'}),
-        dcc.Dropdown(COMPOSTOS, [], id='compound-dropdown', multi=True, placeholder="Compostos", style={'width': '12rem'}),
-        dcc.Dropdown([], None, id='pilot-dropdown', multi=True, placeholder="Filtrar Pilotos", style={'width': '15rem'}),
-        dcc.Dropdown(options=ANALISES,value="bestlap",id='analysis-dropdown',clearable=False,style={'width': '18rem', 'fontWeight': 'bold', 'background': '#23272f','fontFamily': 'Roboto, sans-serif', 'fontSize': 18,'borderRadius': '8px', 'boxShadow': '0 2px 12px #0003'}),
-        html.Button("Buscar", id="buscar-btn", n_clicks=0,
-            style={
-                'height': '44px', 'padding': '0 30px', 'background': '#FFD800', 'border': 'none',
-                'color': '#23272f', 'borderRadius': '7px', 'fontWeight': 700, 'fontSize': 17,
-                'boxShadow': '0 2px 8px #0002', 'cursor': 'pointer'
-            }
-        ),
-    ], style={
-        'display': 'flex', 'gap': '1.1rem', 'marginBottom': '22px',
-        'justifyContent': 'center', 'alignItems': 'center'
-    }),
-
-    html.Div([
-        html.Div(id='info-graph-wrap', children=[
-            html.Div(id='info-box', style={
-                'marginBottom': 18, 'textAlign': 'center', 'width': '100%'
-            }),
-            dcc.Loading(
-                id="loading-graph", type="circle", color="#FFD800",
-                children=html.Div(id='graph-container', style={
-                    'width': '100%',
-                    'maxWidth': '960px',
-                    'margin': '0 auto',
-                    'minHeight': '560px',
-                    'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'
-                })
-            )
-        ], style={'width': '100%', 'maxWidth': '980px', 'margin': '0 auto', 'paddingBottom': '80px'})
-    ]),
-
-    html.Footer([
-        html.P([
-            html.Span("Desenvolvido por Ryan L Broilo"),
-            html.Span(" • ", style={'color': "#FFD800"}),
-            html.Span("Powered by FastF1, Dash, Plotly")
-        ], style={'textAlign': 'center', 'color': '#aaa', 'fontWeight': 400, 'fontSize': 15, 'margin': 0, 'padding': 0})
+
+def build_layout():
+    return html.Div([
+        html.H1("🏁 F1 Analyst - Dashboard Completo",
+                style={'textAlign': 'center', 'marginBottom': 10, 'color': '#f7fafc', 'fontFamily': 'Roboto, sans-serif'}),
+        html.Div([
+            dcc.Dropdown(ANOS, None, id='ano-dropdown', placeholder="Ano", style={'width': '8rem'}),
+            dcc.Dropdown([], None, id='gp-dropdown', placeholder="GP", style={'width': '14rem'}),
+            dcc.Dropdown([], None, id='sessao-dropdown', placeholder="Sessão", style={'width': '9rem'}),
+            dcc.Dropdown(COMPOSTOS, [], id='compound-dropdown', multi=True, placeholder="Compostos", style={'width': '12rem'}),
+            dcc.Dropdown([], None, id='pilot-dropdown', multi=True, placeholder="Filtrar Pilotos", style={'width': '15rem'}),
+            dcc.Dropdown(options=ANALISES,value="bestlap",id='analysis-dropdown',clearable=False,style={'width': '18rem', 'fontWeight': 'bold', 'background': '#23272f','fontFamily': 'Roboto, sans-serif', 'fontSize': 18,'borderRadius': '8px', 'boxShadow': '0 2px 12px #0003'}),
+            html.Button("Buscar", id="buscar-btn", n_clicks=0,
+                style={
+                    'height': '44px', 'padding': '0 30px', 'background': '#FFD800', 'border': 'none',
+                    'color': '#23272f', 'borderRadius': '7px', 'fontWeight': 700, 'fontSize': 17,
+                    'boxShadow': '0 2px 8px #0002', 'cursor': 'pointer'
+                }
+            ),
+            # só aparece com F1_LIVE_FILE configurado (ver live.py)
+            dcc.Checklist([{'label': " 📡 Ao vivo", 'value': "live"}], [], id='live-toggle',
+                          style={} if LIVE_FILE else {'display': 'none'},
+                          labelStyle={'color': '#f7fafc', 'fontWeight': 700, 'fontSize': 16}),
+        ], style={
+            'display': 'flex', 'gap': '1.1rem', 'marginBottom': '22px',
+            'justifyContent': 'center', 'alignItems': 'center'
+        }),
+        dcc.Checklist(RITMO_OPCOES, RITMO_OPCOES_PADRAO, id='ritmo-opcoes', inline=True,
+                      style=ritmo_opcoes_style(None), inputStyle={'marginRight': 6},
+                      labelStyle={'marginRight': 20, 'color': '#f7fafc', 'fontSize': 15}),
+
+        html.Div([
+            html.Div(id='info-graph-wrap', children=[
+                html.Div(id='info-box', style={
+                    'marginBottom': 18, 'textAlign': 'center', 'width': '100%'
+                }),
+                html.Div(id='job-progress', style={
+                    'marginBottom': 8, 'textAlign': 'center', 'color': '#FFD800', 'fontSize': 15
+                }),
+                # delay_show: as consultas rápidas do job-poll não piscam o spinner
+                dcc.Loading(
+                    id="loading-graph", type="circle", color="#FFD800", delay_show=300,
+                    children=html.Div(id='graph-container', children=chart_card(placeholder_figure()), style={
+                        'width': '100%',
+                        'maxWidth': '960px',
+                        'margin': '0 auto',
+                        'minHeight': '560px',
+                        'display': 'flex', 'alignItems': 'center', 'justifyContent': 'center'
+                    })
+                )
+            ], style={'width': '100%', 'maxWidth': '980px', 'margin': '0 auto', 'paddingBottom': '80px'})
+        ]),
+        dcc.Store(id='session-laps'),
+        dcc.Store(id='client-view'),
+        # job da análise em segundo plano; fica na sessionStorage para o navegador que recarrega
+        # a página voltar a acompanhar o mesmo job
+        dcc.Store(id='analysis-job', storage_type='session'),
+        dcc.Store(id='job-rendered'),
+        dcc.Interval(id='job-poll', interval=JOB_POLL_MS, disabled=True),
+        # voltas do modo ao vivo que o navegador já tem na figura (ver atualizar_ao_vivo)
+        dcc.Store(id='live-view'),
+        dcc.Interval(id='live-tick', interval=LIVE_POLL_MS, disabled=True),
+        dcc.Store(id='client-config', data={
+            'template': pio.templates['plotly_dark'].to_plotly_json(),
+            'team_colors': TEAM_COLORS, 'tyre_colors': TYRE_COLORS
+        }),
+
+        html.Footer([
+            html.P([
+                html.Span("Desenvolvido por Ryan L Broilo"),
+                html.Span(" • ", style={'color': "#FFD800"}),
+                html.Span("Powered by FastF1, Dash, Plotly")
+            ], style={'textAlign': 'center', 'color': '#aaa', 'fontWeight': 400, 'fontSize': 15, 'margin': 0, 'padding': 0})
+        ], style={
+            'position': 'fixed',
+            'left': 0,
+            'bottom': 0,
+            'width': '100%',
+            'background': 'rgba(24,27,33,0.97)',
+            'zIndex': 10,
+            'padding': '10px 0'
+        })
     ], style={
-        'position': 'fixed',
-        'left': 0,
-        'bottom': 0,
-        'width': '100%',
-        'background': 'rgba(24,27,33,0.97)',
-        'zIndex': 10,
-        'padding': '10px 0'
+        'background': '#181b21',
+        'padding': '1rem',
+        'minHeight': '100vh',
+        'fontFamily': 'Roboto, sans-serif',
+        'boxSizing': 'border-box'
     })
-], style={
-    'background': '#181b21',
-    'padding': '1rem',
-    'minHeight': '100vh',
-    'fontFamily': 'Roboto, sans-serif',
-    'boxSizing': 'border-box'
-})
-
-@app.callback(
-    Output('gp-dropdown', 'options'), Output('gp-dropdown', 'value'),
-    Input('ano-dropdown', 'value'),
-)
+
+@traced('update_gp_options')
 def update_gp_options(ano):
     if not ano:
         return [], None
+    tag(cache='hit' if calendar_cached(ano) else 'miss')
+    stage('load')
     options = get_gp_options(ano)
+    set_payload(options)
     return options, None
 
-@app.callback(
-    Output('sessao-dropdown', 'options'), Output('sessao-dropdown', 'value'),
-    Input('ano-dropdown', 'value'), Input('gp-dropdown', 'value'), Input('analysis-dropdown', 'value'),
-)
 def update_session_options(ano, gp, analysis):
+    if ano and analysis == "season_trend":
+        return [{'label': "N/A", 'value': "N/A"}], "N/A"
     if not ano or not gp:
         return [], None
-    if analysis in ["power_race", "power_qualify", "pitwindow"]:
+    if analysis in ANALISES_SEM_SESSAO:
         return [{'label': "N/A", 'value': "N/A"}], "N/A"
     options = get_session_options(ano, gp)
     return options, None
 
-@app.callback(
-    Output('sessao-dropdown', 'disabled'), Output('sessao-dropdown', 'placeholder'),
-    Input('analysis-dropdown', 'value'),
-)
 def toggle_sessao_dropdown(analysis):
-    if analysis in ["power_race", "power_qualify", "pitwindow"]:
+    if analysis in ANALISES_SEM_SESSAO:
         return True, "N/A"
     else:
         return False, "Sessão"
 
-@app.callback(
-    Output('pilot-dropdown', 'options'), Output('pilot-dropdown', 'value'),
-    Input('ano-dropdown', 'value'), Input('gp-dropdown', 'value'),
-    Input('sessao-dropdown', 'value'), Input('analysis-dropdown', 'value'),
-    State('pilot-dropdown', 'value')
-)
+def ritmo_opcoes_style(analysis):
+    if analysis == "ritmo":
+        return {'display': 'flex', 'justifyContent': 'center', 'marginBottom': '16px'}
+    return {'display': 'none'}
+
+@traced('update_pilot_options')
 def update_pilot_options(ano, gp, sessao, analysis, current_pilots):
-    if analysis in ["power_race", "power_qualify", "pitwindow"]:
+    if analysis in ANALISES_SEM_SESSAO:
         return [], None
     if not ano or not gp or not sessao:
         return [], None
     try:
-        session = fastf1.get_session(ano, gp, sessao)
-        session.load()
+        # a lista de pilotos só precisa das voltas; a telemetria fica para o Buscar, em segundo plano
+        profile = ANALISE_PERFIL.get(analysis, PROFILE_LAPS) & PROFILE_LAPS_RCM
+        cached = session_cache.peek(session_key(ano, gp, sessao))
+        tag(branch=analysis, session=(ano, gp, sessao), cache='hit' if cached and profile <= cached[1] else 'miss')
+        stage('load')
+        session = load_session(ano, gp, sessao, profile)
+        stage('aggregate')
         laps = session.laps
         if laps.empty:
             return [], None
         pilotos = sorted(laps['Driver'].unique())
         pilot_opts = [{'label': p, 'value': p} for p in pilotos]
+        set_payload(pilot_opts)
         if current_pilots:
             current_pilots = [p for p in current_pilots if p in pilotos]
             return pilot_opts, current_pilots if current_pilots else None
@@ -197,139 +284,605 @@ def update_pilot_options(ano, gp, sessao, analysis, current_pilots):
     except Exception:
         return [], None
 
-@app.callback(
-    Output('info-box', 'children'),
-    Output('graph-container', 'children'),
-    Input('buscar-btn', 'n_clicks'),
-    State('ano-dropdown', 'value'),
-    State('gp-dropdown', 'value'),
-    State('sessao-dropdown', 'value'),
-    State('compound-dropdown', 'value'),
-    State('pilot-dropdown', 'value'),
-    State('analysis-dropdown', 'value')
-)
-def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
-    card_style = "card-material"
-    chart_height = 530
-
-    def chart_card(fig):
-        return html.Div([
-            dcc.Graph(figure=fig, style={'height': f'{chart_height}px', 'width': '100%'})
-        ], className=card_style, style={
-            'maxWidth': '980px', 'margin': '0 auto', 'padding': '16px 22px 14px 22px'
-        })
+def sector_info_box(bests):
+    sector_names = ['Setor 1', 'Setor 2', 'Setor 3']
+    rows = []
+    for i, (best, name) in enumerate(zip(bests.itertuples(), sector_names)):
+        if best.Driver is None:
+            rows.append(html.Div([
+                html.Span(SECTOR_ICONS[i], className='material-icon'),
+                f"{name}: --"
+            ], className="material-row"))
+            continue
+        piloto = best.Driver
+        tempo = format_time(best.Time)
+        rows.append(html.Div([
+            html.Span(SECTOR_ICONS[i], className='material-icon'),
+            html.B(f"{name}: ", style={'color': '#fff'}),
+            html.Span(piloto, style={'color': '#fff', 'fontWeight': 'bold', 'marginRight': 6}),
+            html.Span(f"Tempo: {tempo}", style={'color': '#FFD800'})
+        ], className="material-row"))
+    return html.Div([
+        html.Div([html.Span("Melhores Setores da Sessão", className="card-title", style={'color': '#fff', 'fontWeight': 'bold'})],
+                 style={'textAlign': 'center', 'marginBottom': '5px'}),
+        *rows
+    ], className="card-material", style={'margin': '0 auto', 'display': 'inline-block', 'textAlign': 'center'})
+
+@traced('buscar_dados')
+def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis, client_view):
+    if n_clicks == 0 or not ano or (not gp and analysis != "season_trend") or (not sessao and analysis not in ANALISES_SEM_SESSAO):
+        return "", placeholder_figure(), None, None, None
+
+    tag(branch=analysis, session=(ano, gp, sessao))
+    if analysis in ANALISES_CLIENTE:
+        return (*buscar_dados_cliente(n_clicks, ano, gp, sessao, analysis, client_view), None)
+
+    key = figure_key(ano, gp, sessao, composto, pilotos, analysis)
+    cached = figure_cache.get(key)
+    if cached is not None:
+        tag(cache='hit')
+        info_box, fig_json = cached
+        stage('serialize')
+        set_payload(fig_json)
+        return info_box, json.loads(fig_json), None, None, None
+    if precisa_de_job(ano, gp, sessao, analysis):
+        # carga fria: a requisição volta na hora e o navegador acompanha o job pelo job-poll
+        pedido = [ano, gp, sessao, composto, pilotos, analysis]
+        compartilhado = load_shared(key)
+        if compartilhado is not None and compartilhado['status'] == 'done':
+            # outro worker já terminou essa análise
+            tag(cache='hit')
+            set_payload(compartilhado['figure'])
+            return json.loads(compartilhado['info_box']), json.loads(compartilhado['figure']), None, None, None
+        tag(cache='job')
+        if compartilhado is not None and compartilhado['status'] in ('queued', 'running'):
+            # já roda em outro worker: o navegador acompanha aquele job em vez de abrir outro
+            job_id = compartilhado['id']
+        else:
+            job_id = submeter_job(key, pedido).id
+        return "", placeholder_figure("⏳ Carregando sessões..."), None, None, {'id': job_id, 'pedido': pedido}
+    tag(cache='miss')
+    try:
+        info_box, fig_json = render_analysis(ano, gp, sessao, composto, pilotos, analysis)
+    except AnaliseIndisponivel as exc:
+        # falha de carga é transitória, então não vai para o cache
+        tag(cache='error')
+        return exc.info_box, placeholder_figure(exc.titulo), None, None, None
+    figure_cache.put(key, (info_box, fig_json), figure_ttl(ano, gp, sessao, analysis))
+    return info_box, json.loads(fig_json), None, None, None
+
+def precisa_de_job(ano, gp, sessao, analysis):
+    if analysis == "season_trend":
+        # só as sessões encerradas que ainda não estão na tabela da temporada precisam de carga
+        try:
+            return bool(pending_sessions(ano))
+        except Exception:
+            return False
+    if analysis == "telemetria":
+        # a telemetria não vai para o lap store: fora do cache é sempre uma carga longa do fastf1
+        cached = session_cache.peek(session_key(ano, gp, sessao))
+        return cached is None or not ANALISE_PERFIL[analysis] <= cached[1]
+    return analysis in ANALISES_EM_SEGUNDO_PLANO and not sessoes_em_cache(ano, gp, analysis)
+
+def sessoes_em_cache(ano, gp, analysis):
+    profile = ANALISE_PERFIL[analysis]
+    for sessao in ANALISES_EM_SEGUNDO_PLANO[analysis]:
+        cached = session_cache.peek(session_key(ano, gp, sessao))
+        if cached is None or not profile <= cached[1]:
+            return False
+    return True
+
+@traced('analise_em_segundo_plano')
+def analise_em_segundo_plano(job, key, ano, gp, sessao, composto, pilotos, analysis):
+    # roda numa thread do job_queue; o resultado final também vai para o cache de figuras
+    tag(branch=analysis, session=(ano, gp, sessao), cache='job')
+    if analysis == "power_race":
+        info_box, fig = power_race_progressivo(job, ano, gp)
+        stage('serialize')
+        fig_json = fig.to_json()
+        set_payload(fig_json)
+    elif analysis == "season_trend":
+        job.report(0.0, "Atualizando a tabela da temporada...")
+        stage('load')
+        update_season(ano, report=job.report)
+        info_box, fig_json = render_analysis(ano, gp, sessao, composto, pilotos, analysis)
+    elif analysis == "telemetria":
+        job.report(0.0, f"Carregando telemetria de {sessao}...")
+        info_box, fig_json = render_analysis(ano, gp, sessao, composto, pilotos, analysis)
+    else:
+        job.report(0.0, f"Carregando {', '.join(ANALISES_EM_SEGUNDO_PLANO[analysis])}...")
+        info_box, fig_json = render_analysis(ano, gp, sessao, composto, pilotos, analysis)
+    figure_cache.put(key, (info_box, fig_json), figure_ttl(ano, gp, sessao, analysis))
+    return info_box, fig_json
+
+def power_race_progressivo(job, ano, gp):
+    # o gráfico sai com o primeiro treino carregado e é refeito a cada treino que chega
+    treinos = ANALISES_EM_SEGUNDO_PLANO["power_race"]
+    job.report(0.0, "Carregando treinos livres...")
+    prontos = {}
+    stage('load')
+    cargas = iter_load_sessions([(ano, gp, treino) for treino in treinos], ANALISE_PERFIL["power_race"], loader=load_artifacts)
+    for n, (key, artifacts, _) in enumerate(cargas, start=1):
+        if artifacts is not None:
+            prontos[key[2]] = artifacts.laps
+        carregados = [treino for treino in treinos if treino in prontos]
+        if n == len(treinos) or not carregados:
+            job.report(n / len(treinos), f"{n} de {len(treinos)} treinos processados")
+            continue
+        try:
+            info_box, fig = power_race_figure([prontos[t] for t in carregados], "", parcial=carregados)
+        except AnaliseIndisponivel:
+            continue
+        job.report(n / len(treinos), f"{', '.join(carregados)} carregado(s), aguardando os demais treinos", ("", fig.to_json()))
+        stage('load')
+    return power_race_figure([prontos[t] for t in treinos if t in prontos], "")
+
+def submeter_job(key, pedido):
+    return job_queue.submit(key, lambda job: analise_em_segundo_plano(job, key, *pedido),
+                            publish=lambda snap: publicar_job(key, pedido, snap))
+
+def publicar_job(key, pedido, snap):
+    # andamento e resultado final do job em disco, para os polls que caem em outros workers
+    doc = {'id': snap['id'], 'status': snap['status'], 'progress': snap['progress'], 'message': snap['message']}
+    if snap['status'] == 'done':
+        info_box, fig_json = snap['result']
+        doc.update(info_box=json.dumps(info_box, cls=PlotlyJSONEncoder), figure=fig_json)
+        save_shared(key, doc, figure_ttl(*pedido[:3], pedido[5]))
+        return
+    if snap['status'] == 'error' and isinstance(snap['error'], AnaliseIndisponivel):
+        doc.update(info_box=json.dumps(snap['error'].info_box, cls=PlotlyJSONEncoder), titulo=snap['error'].titulo)
+    save_shared(key, doc)
+
+def acompanhar_job_compartilhado(analysis_job):
+    # o job só existe no worker que recebeu o Buscar; nos outros o andamento e o resultado chegam
+    # pelo disco (publicar_job) e o navegador continua esperando, sem refazer a análise aqui
+    key = figure_key(*analysis_job['pedido'])
+    cached = figure_cache.get(key)
+    if cached is not None:
+        info_box, fig_json = cached
+        set_payload(fig_json)
+        return info_box, json.loads(fig_json), "", True, [analysis_job['id'], 'final']
+    doc = load_shared(key)
+    if doc is None:
+        return "", placeholder_figure("Resultado expirado, clique em Buscar de novo!"), "", True, None
+    if doc['status'] == 'error':
+        info_box = json.loads(doc['info_box']) if 'info_box' in doc else ""
+        return info_box, placeholder_figure(doc.get('titulo', "Erro ao carregar dados dessa sessão!")), "", True, None
+    if doc['status'] == 'done':
+        set_payload(doc['figure'])
+        return json.loads(doc['info_box']), json.loads(doc['figure']), "", True, [analysis_job['id'], 'final']
+    return no_update, no_update, f"⏳ {doc['message'] or 'Na fila...'} ({doc['progress']:.0%})", False, no_update
+
+@traced('acompanhar_job')
+def acompanhar_job(n_intervals, analysis_job, rendered):
+    if not analysis_job:
+        return no_update, no_update, "", True, no_update
+    job = job_queue.get(analysis_job['id'])
+    if job is None:
+        return acompanhar_job_compartilhado(analysis_job)
+    snap = job.snapshot()
+    ativo = snap['status'] in ('queued', 'running')
+    progresso = f"⏳ {snap['message'] or 'Na fila...'} ({snap['progress']:.0%})" if ativo else ""
+    if snap['status'] == 'error':
+        exc = snap['error']
+        if isinstance(exc, AnaliseIndisponivel):
+            return exc.info_box, placeholder_figure(exc.titulo), "", True, None
+        return "", placeholder_figure("Erro ao carregar dados dessa sessão!"), "", True, None
+    versao = [job.id, snap['version']]
+    if snap['result'] is None or rendered == versao:
+        return no_update, no_update, progresso, not ativo, no_update
+    info_box, fig_json = snap['result']
+    set_payload(fig_json)
+    return info_box, json.loads(fig_json), progresso, not ativo, versao
+
+def buscar_dados_cliente(n_clicks, ano, gp, sessao, analysis, client_view):
+    # o navegador monta a figura (assets/client_analyses.js); o servidor só manda as voltas da
+    # sessão, e só quando o navegador ainda não tem as dessa sessão
+    sessao_atual = [int(ano), gp, sessao]
+    view = {'analysis': analysis, 'session': sessao_atual, 'n': n_clicks}
+    if client_view and client_view.get('session') == sessao_atual:
+        tag(cache='browser')
+        return no_update, no_update, no_update, view
+
+    key = ('dataset', *sessao_atual)
+    cached = figure_cache.get(key)
+    tag(cache='miss' if cached is None else 'hit')
+    if cached is None:
+        stage('load')
+        try:
+            # um conjunto de voltas serve às quatro análises, então carrega o perfil mais completo delas
+            artifacts = load_artifacts(ano, gp, sessao, PROFILE_LAPS_RCM)
+        except Exception:
+            return "", placeholder_figure("Erro ao carregar dados dessa sessão!"), None, None
+        if artifacts.laps.empty:
+            return "", placeholder_figure("Sem dados para esta sessão!"), None, None
+        stage('aggregate')
+        dataset = {**artifacts.dataset, 'session': sessao_atual}
+        info_box = sector_info_box(artifacts.sector_bests)
+        stage('serialize')
+        cached = (info_box, json.dumps(dataset))
+        figure_cache.put(key, cached, figure_ttl(ano, gp, sessao, analysis))
+    info_box, dataset_json = cached
+    stage('serialize')
+    set_payload(dataset_json)
+    return info_box, no_update, json.loads(dataset_json), view
+
+def power_race_figure(sessions_free, info_box, parcial=None):
+    # sessions_free: voltas dos treinos livres já carregados; parcial: treinos que entraram até agora
+    titulo = "🔮 Força das Equipes na Corrida (gap p/ líder, médias dos TL)"
+    if parcial:
+        titulo += f" — parcial: {', '.join(parcial)}"
+    stage('aggregate')
+    if not sessions_free:
+        raise AnaliseIndisponivel(info_box, "Sem dados suficientes para previsão de corrida!")
+    df_free = pd.concat(sessions_free)
+    df_free = df_free[df_free['LapTime_s'].notnull()]
+    if df_free.empty:
+        return info_box, px.bar(title="Sem dados para este treino!", template="plotly_dark")
+    team_race = team_gaps(top_n_laps(df_free, 5))
+    team_race['Gap_lider_str'] = team_race['Gap_lider'].apply(lambda x: "" if x == 0 else f"+{x:.3f}s")
+    color_team = [TEAM_COLORS.get(t, "#222") for t in team_race['Team']]
+    min_time = team_race['LapTime_s'].min()
+    max_time = team_race['LapTime_s'].max()
+    margin = (max_time - min_time) * 0.15 if (max_time - min_time) > 0 else 1
+    stage('figure')
+    fig = px.bar(
+        team_race,
+        x='Team',
+        y='LapTime_s',
+        title=titulo,
+        labels={'LapTime_s': 'Ritmo médio (s)'},
+        color='Team',
+        color_discrete_sequence=color_team,
+        text='Gap_lider_str',
+        template="plotly_dark"
+    )
+    fig.update_traces(
+        textposition='outside',
+        hovertemplate="Equipe: %{x}<br>Ritmo Médio: %{y:.3f}s<br>Gap p/ líder: %{text}"
+    )
+    fig.update_layout(
+        xaxis=dict(categoryorder="array", categoryarray=team_race['Team']),
+        yaxis=dict(range=[min_time - margin, max_time + margin]),
+        showlegend=False,
+        font=dict(size=15)
+    )
+    return info_box, fig
+
+def season_trend_figure(ritmo, info_box):
+    # ritmo: gap de cada equipe para a melhor em cada etapa (season.team_pace_by_event)
+    if ritmo.empty:
+        return info_box, px.bar(title="Sem sessões encerradas nesta temporada!", template="plotly_dark")
+    ritmo = ritmo.sort_values(['Ordem', 'Gap_lider'], kind='stable')
+    ritmo['Etapa'] = ritmo['EventName'].str.replace(" Grand Prix", "", regex=False)
+    etapas = list(dict.fromkeys(ritmo['Etapa']))
+    stage('figure')
+    fig = px.line(
+        ritmo,
+        x='Etapa',
+        y='Gap_lider',
+        color='Team',
+        facet_row='Metrica',
+        markers=True,
+        title="📉 Força das Equipes na Temporada (gap p/ melhor equipe por etapa)",
+        labels={'Gap_lider': 'Gap (s)', 'Etapa': '', 'Team': 'Equipe'},
+        category_orders={'Etapa': etapas, 'Metrica': ["Corrida (TL)", "Qualify"]},
+        color_discrete_map={t: TEAM_COLORS.get(t, "#222") for t in ritmo['Team'].unique()},
+        template="plotly_dark"
+    )
+    fig.update_traces(hovertemplate="Etapa: %{x}<br>Gap p/ melhor: +%{y:.3f}s")
+    fig.for_each_annotation(lambda a: a.update(text=a.text.split("=")[-1]))
+    fig.update_yaxes(autorange="reversed", matches=None)
+    fig.update_layout(font=dict(size=13), legend=dict(font=dict(size=11)))
+    return info_box, fig
+
+def render_analysis(ano, gp, sessao, composto, pilotos, analysis):
+    # figura já serializada, pronta para o cache de figuras, para o navegador e para o export.py
+    info_box, fig = build_analysis(ano, gp, sessao, composto, pilotos, analysis)
+    stage('serialize')
+    fig_json = fig.to_json()
+    set_payload(fig_json)
+    return info_box, fig_json
+
+def ritmo_figure(df, pace, best_laps, opcoes):
+    # todos os pilotos de df em Scattergl (WebGL): voltas limpas como pontos e a mediana móvel de
+    # aggregations.rolling_pace como linha; espelha o figRitmo de assets/client_analyses.js
+    combustivel, pneu = "combustivel" in opcoes, "pneu" in opcoes
+    mediana = "mediana" in opcoes
+    serie = {(True, True): 'fuel_tyre', (True, False): 'fuel', (False, True): 'tyre'}.get((combustivel, pneu), 'raw')
+    limpa = df['LapTime_s'].notna() & df['PitInTime_s'].isna()
+    voltas = pd.DataFrame({
+        'Driver': df['Driver'].astype(object), 'Team': df['Team'].astype(object),
+        'LapNumber': df['LapNumber'].astype('int32'),
+        'Tempo': (df['LapTime_s'] - pace['Fuel_s'] * combustivel - pace['Tyre_s'] * pneu).astype('float32'),
+        'Mediana': pace[f'Median_{serie}']
+    })[limpa].sort_values('LapNumber', kind='stable')
+    if voltas.empty:
+        return px.bar(title="Sem voltas para comparar ritmo.", template="plotly_dark")
+    stage('figure')
+    por_piloto = dict(tuple(voltas.groupby('Driver', sort=False)))
+    ordem = [p for p in best_laps['Driver'] if p in por_piloto] + [p for p in por_piloto if p not in set(best_laps['Driver'])]
+    equipes_vistas = set()
+    traces = []
+    for piloto in ordem:
+        grupo = por_piloto[piloto]
+        equipe = grupo['Team'].iloc[0]
+        cor = TEAM_COLORS.get(equipe, "#222")
+        segundo = equipe in equipes_vistas
+        equipes_vistas.add(equipe)
+        x = grupo['LapNumber'].to_numpy()
+        traces.append(go.Scattergl(
+            x=x, y=grupo['Tempo'].to_numpy().round(3), mode='markers' if mediana else 'lines+markers',
+            name=piloto, legendgroup=piloto, showlegend=not mediana,
+            marker=dict(color=cor, size=5 if mediana else 6, opacity=0.35 if mediana else 1,
+                        symbol='diamond' if segundo else 'circle'),
+            line=dict(color=cor, dash='dot' if segundo else 'solid'),
+            hovertemplate=f"{piloto}<br>Volta %{{x}}<br>Tempo: %{{y:.3f}}s<extra></extra>"
+        ))
+        if mediana:
+            traces.append(go.Scattergl(
+                x=x, y=grupo['Mediana'].to_numpy().round(3), mode='lines', name=piloto, legendgroup=piloto,
+                connectgaps=False, line=dict(color=cor, width=2.5, dash='dot' if segundo else 'solid'),
+                hovertemplate=f"{piloto}<br>Volta %{{x}}<br>Mediana ({PACE_WINDOW} voltas): %{{y:.3f}}s<extra></extra>"
+            ))
+    titulo = f"📈 Ritmo: {ordem[0]} vs {ordem[1]}" if len(ordem) == 2 else f"📈 Ritmo de {len(ordem)} pilotos"
+    correcoes = [nome for nome, ligada in (("combustível", combustivel), ("pneu", pneu)) if ligada]
+    if correcoes:
+        titulo += f" (corrigido: {' e '.join(correcoes)})"
+    fig = go.Figure(traces)
+    fig.update_layout(
+        title=titulo,
+        xaxis_title='Nº da Volta',
+        yaxis_title='Tempo da Volta (s)',
+        font=dict(size=15),
+        hovermode='closest',
+        legend=dict(font=dict(size=12)),
+        template="plotly_dark"
+    )
+    return fig
+
+def telemetria_figure(artifacts, best_laps, pilotos):
+    # volta mais rápida de cada piloto no mesmo eixo de distância: velocidade, diferença de tempo
+    # para a mais rápida delas e acelerador. As voltas alinhadas ficam no cache da sessão
+    # (SessionArtifacts.lap_trace) e cada traço vai reduzido por LTTB
+    voltas = best_laps.head(TELEMETRIA_MAX_PILOTOS if pilotos else 2)
+    alinhadas = []
+    for volta in voltas.itertuples():
+        trace = artifacts.lap_trace(volta.Driver, volta.LapNumber)
+        if trace is not None:
+            alinhadas.append((volta.Driver, volta.Team, volta.LapTime_s, trace))
+    if not alinhadas:
+        return px.bar(title="Sem telemetria para esta sessão!", template="plotly_dark")
+    stage('figure')
+    comprimento = float(np.mean([trace['length'] for *_, trace in alinhadas]))
+    x = np.linspace(0, comprimento, len(alinhadas[0][3]['Speed']))
+    referencia = alinhadas[0][3]['Time'] - alinhadas[0][3]['Time'][0]
+    fig = make_subplots(rows=3, cols=1, shared_xaxes=True, row_heights=[0.55, 0.2, 0.25], vertical_spacing=0.04)
+    equipes_vistas = set()
+    for piloto, equipe, tempo, trace in alinhadas:
+        cor = TEAM_COLORS.get(equipe, "#222")
+        dash = 'dot' if equipe in equipes_vistas else 'solid'
+        equipes_vistas.add(equipe)
+        delta = (trace['Time'] - trace['Time'][0]) - referencia
+        for row, y, unidade in ((1, trace['Speed'], "km/h"), (2, delta, "s"), (3, trace['Throttle'], "%")):
+            idx = lttb(x, y)
+            fig.add_trace(go.Scattergl(
+                x=x[idx].astype('float32'), y=np.asarray(y)[idx].astype('float32'), mode='lines',
+                name=piloto, legendgroup=piloto, showlegend=row == 1, line=dict(color=cor, width=2 if row == 1 else 1.5, dash=dash),
+                hovertemplate=f"{piloto}<br>%{{x:.0f}} m<br>%{{y:.{3 if row == 2 else 0}f}} {unidade}<extra></extra>"
+            ), row=row, col=1)
+    fig.update_yaxes(title_text="Velocidade (km/h)", row=1, col=1)
+    fig.update_yaxes(title_text=f"Δ {alinhadas[0][0]} (s)", zeroline=True, row=2, col=1)
+    fig.update_yaxes(title_text="Acelerador (%)", range=[-5, 105], row=3, col=1)
+    fig.update_xaxes(title_text="Distância (m)", row=3, col=1)
+    fig.update_layout(
+        title="🏎️ Telemetria — " + " vs ".join(f"{piloto} {format_time(tempo)}" for piloto, _, tempo, _ in alinhadas),
+        font=dict(size=13),
+        hovermode='closest',
+        margin=dict(l=60, r=25, t=60, b=40),
+        template="plotly_dark"
+    )
+    return fig
 
-    if n_clicks == 0 or not ano or not gp or (not sessao and analysis not in ["power_race", "power_qualify", "pitwindow"]):
-        fig_placeholder = px.bar(title="Selecione os filtros e clique em Buscar!", template="plotly_dark")
-        return "", chart_card(fig_placeholder)
+def alternar_ao_vivo(ligado):
+    # ao ligar, a próxima figura ao vivo sai inteira e o navegador para de redesenhar a análise
+    # anterior ao mudar compostos/pilotos
+    if ligado:
+        return False, None, None
+    return True, None, no_update
 
+def sair_do_ao_vivo(n_clicks):
+    # o Buscar troca a figura, então os patches do ao vivo não se aplicam mais a ela
+    return []
+
+@traced('atualizar_ao_vivo')
+def atualizar_ao_vivo(n_intervals, view):
+    # cada tick lê só as mensagens novas do live timing; o navegador que já tem as primeiras
+    # view['n'] voltas recebe só um Patch com as voltas e stints novos
+    live = get_live_session()
+    with live.lock:
+        stage('load')
+        live.poll()
+        n = len(live.laps)
+        tag(branch='live', session=(live.evento, live.sessao))
+        if not n:
+            tag(cache='idle')
+            if view is None:
+                return "", placeholder_figure("📡 Aguardando voltas do live timing..."), {'n': 0, 'info': -1}
+            return no_update, no_update, no_update
+        stage('figure')
+        if view is None or view['n'] > n or not view['n']:
+            # primeira figura, ou o tick caiu num worker que ainda não leu tanto do feed
+            tag(cache='full')
+            fig = live_figure(live)
+            info_box = live_info_box(live)
+            stage('serialize')
+            set_payload(fig.to_json())
+            return info_box, fig, {'n': n, 'info': live.info_version}
+        if view['n'] == n:
+            tag(cache='idle')
+            return no_update, no_update, no_update
+        tag(cache='patch')
+        patch = live_patch(live, view['n'])
+        info_box = live_info_box(live) if live.info_version != view['info'] else no_update
+        stage('serialize')
+        set_payload(patch.to_plotly_json())
+        return info_box, patch, {'n': n, 'info': live.info_version}
+
+def live_titulo(live):
+    volta = max(lap['LapNumber'] for lap in live.laps)
+    return f"📡 Ao vivo — {live.evento} · {live.sessao} · volta {volta}"
+
+def live_driver_trace(piloto, equipe, segundo, voltas):
+    # tempos das voltas limpas no gráfico de cima (eixos x/y); segundo piloto da equipe tracejado
+    cor = TEAM_COLORS.get(equipe, "#ccc")
+    return go.Scattergl(
+        x=[lap['LapNumber'] for lap in voltas], y=[round(lap['LapTime_s'], 3) for lap in voltas],
+        mode='lines+markers', name=piloto, legendgroup=piloto, xaxis='x', yaxis='y',
+        marker=dict(color=cor, size=6, symbol='diamond' if segundo else 'circle'),
+        line=dict(color=cor, dash='dot' if segundo else 'solid'),
+        hovertemplate=f"{piloto}<br>Volta %{{x}}<br>Tempo: %{{y:.3f}}s<extra></extra>"
+    ).to_plotly_json()
+
+def live_stint_trace(composto, stints):
+    # stints de um composto no gráfico de baixo (eixos x2/y2), como no pitwindow
+    return go.Bar(
+        y=[driver for driver, _ in stints], x=[stint['StintTotalLaps'] for _, stint in stints],
+        base=[stint['Lap'] for _, stint in stints], orientation='h', name=composto, showlegend=False,
+        xaxis='x2', yaxis='y2', marker=dict(color=TYRE_COLORS[composto], line=dict(width=0)),
+        hovertemplate=f"Piloto: %{{y}}<br>Voltas: %{{x}}<br>Pneu: {composto}<extra></extra>"
+    ).to_plotly_json()
+
+def _stints_ao_vivo(live):
+    # stints de cada traço de barras, na posição em que estão no traço
+    slots = {composto: [] for composto in COMPOSTOS_AO_VIVO}
+    for composto, keys in live.stint_slots().items():
+        slots[composto if composto in slots else "UNKNOWN"].extend(keys)
+    return slots
+
+def _segundos_pilotos(live, ordem):
+    equipes_vistas, segundos = set(), set()
+    for piloto in ordem:
+        equipe = live.laps[live.first_seen[piloto]]['Team']
+        if equipe in equipes_vistas:
+            segundos.add(piloto)
+        equipes_vistas.add(equipe)
+    return segundos
+
+def live_figure(live):
+    slots = _stints_ao_vivo(live)
+    ordem = live.driver_order()
+    segundos = _segundos_pilotos(live, ordem)
+    por_piloto = {piloto: [] for piloto in ordem}
+    for lap in live.laps:
+        if is_clean(lap):
+            por_piloto[lap['Driver']].append(lap)
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, row_heights=[0.65, 0.35], vertical_spacing=0.06)
+    for composto in COMPOSTOS_AO_VIVO:
+        fig.add_trace(live_stint_trace(composto, [(k[0], live.stints[k]) for k in slots[composto]]))
+    for piloto in ordem:
+        equipe = live.laps[live.first_seen[piloto]]['Team']
+        fig.add_trace(live_driver_trace(piloto, equipe, piloto in segundos, por_piloto[piloto]))
+    fig.update_layout(
+        title=live_titulo(live),
+        barmode='overlay',
+        font=dict(size=15),
+        hovermode='closest',
+        legend=dict(font=dict(size=12)),
+        # zoom e legenda continuam como o usuário deixou entre os patches
+        uirevision='ao-vivo',
+        template="plotly_dark"
+    )
+    fig.update_yaxes(title_text='Tempo da Volta (s)', row=1, col=1)
+    fig.update_xaxes(title_text='Nº da Volta', row=2, col=1)
+    return fig
+
+def live_patch(live, desde):
+    # só o que mudou desde as primeiras `desde` voltas: pontos novos no fim dos traços dos pilotos,
+    # duração dos stints em andamento, stints e pilotos novos como traços/barras acrescentados
+    patch = Patch()
+    novas = live.laps[desde:]
+    tocados = {(lap['Driver'], lap['Stint']) for lap in novas}
+    for i, keys in enumerate(_stints_ao_vivo(live).values()):
+        for pos, key in enumerate(keys):
+            if key not in tocados:
+                continue
+            stint = live.stints[key]
+            if live.stint_first[key] < desde:
+                patch['data'][i]['x'][pos] = stint['StintTotalLaps']
+            else:
+                patch['data'][i]['y'].append(key[0])
+                patch['data'][i]['x'].append(stint['StintTotalLaps'])
+                patch['data'][i]['base'].append(stint['Lap'])
+    ordem = live.driver_order()
+    segundos = _segundos_pilotos(live, ordem)
+    por_piloto = {}
+    for lap in novas:
+        if is_clean(lap):
+            por_piloto.setdefault(lap['Driver'], []).append(lap)
+    for pos, piloto in enumerate(ordem):
+        voltas = por_piloto.get(piloto, [])
+        if live.first_seen[piloto] >= desde:
+            equipe = live.laps[live.first_seen[piloto]]['Team']
+            patch['data'].append(live_driver_trace(piloto, equipe, piloto in segundos, voltas))
+        elif voltas:
+            traco = patch['data'][len(COMPOSTOS_AO_VIVO) + pos]
+            traco['x'].extend([lap['LapNumber'] for lap in voltas])
+            traco['y'].extend([round(lap['LapTime_s'], 3) for lap in voltas])
+    patch['layout']['title']['text'] = live_titulo(live)
+    return patch
+
+def live_info_box(live):
+    melhores = sorted(live.bests.values(), key=lambda lap: lap['LapTime_s'])[:5]
+    rows = [html.Div([
+        html.Span(f"{i}º", className='material-icon'),
+        html.Span(lap['Driver'], style={'color': '#fff', 'fontWeight': 'bold', 'marginRight': 6}),
+        html.Span(f"Tempo: {format_time(lap['LapTime_s'])}", style={'color': '#FFD800', 'marginRight': 6}),
+        html.Span(f"volta {lap['LapNumber']} ({lap['Compound']})", style={'color': '#aaa'})
+    ], className="material-row") for i, lap in enumerate(melhores, start=1)]
+    return html.Div([
+        sector_info_box(live.sector_frame()),
+        html.Div([
+            html.Div([html.Span("Melhores Voltas", className="card-title", style={'color': '#fff', 'fontWeight': 'bold'})],
+                     style={'textAlign': 'center', 'marginBottom': '5px'}),
+            *rows
+        ], className="card-material", style={'margin': '0 0 0 16px', 'display': 'inline-block', 'textAlign': 'center'})
+    ])
+
+def build_analysis(ano, gp, sessao, composto, pilotos, analysis):
     info_box = ""
-    if (sessao and sessao != "N/A") and analysis in ["bestlap", "heatmap", "stint", "ritmo"]:
+    stage('load')
+    if (sessao and sessao != "N/A") and analysis in ["bestlap", "heatmap", "stint", "ritmo", "telemetria"]:
         try:
-            session = fastf1.get_session(ano, gp, sessao)
-            session.load()
-            laps = session.laps
-            if not laps.empty:
-                sectors = ['Sector1Time', 'Sector2Time', 'Sector3Time']
-                sector_names = ['Setor 1', 'Setor 2', 'Setor 3']
-                rows = []
-                for i, (sector, name) in enumerate(zip(sectors, sector_names)):
-                    valid = laps[laps[sector].notnull()]
-                    if valid.empty:
-                        rows.append(html.Div([
-                            html.Span(SECTOR_ICONS[i], className='material-icon'),
-                            f"{name}: --"
-                        ], className="material-row"))
-                        continue
-                    best_idx = valid[sector].idxmin()
-                    best = valid.loc[best_idx]
-                    piloto = best['Driver']
-                    tempo = format_time(best[sector])
-                    rows.append(html.Div([
-                        html.Span(SECTOR_ICONS[i], className='material-icon'),
-                        html.B(f"{name}: ", style={'color': '#fff'}),
-                        html.Span(piloto, style={'color': '#fff', 'fontWeight': 'bold', 'marginRight': 6}),
-                        html.Span(f"Tempo: {tempo}", style={'color': '#FFD800'})
-                    ], className="material-row"))
-                info_box = html.Div([
-                    html.Div([html.Span("Melhores Setores da Sessão", className="card-title", style={'color': '#fff', 'fontWeight': 'bold'})],
-                             style={'textAlign': 'center', 'marginBottom': '5px'}),
-                    *rows
-                ], className="card-material", style={'margin': '0 auto', 'display': 'inline-block', 'textAlign': 'center'})
+            artifacts = load_artifacts(ano, gp, sessao, ANALISE_PERFIL.get(analysis, PROFILE_LAPS))
+            if not artifacts.laps.empty:
+                info_box = sector_info_box(artifacts.sector_bests)
         except Exception:
             info_box = ""
 
     # ========== POWER_RACE ==========
     if analysis == "power_race":
-        sessions_free = []
-        for treino in ["FP1", "FP2", "FP3"]:
-            try:
-                sess = fastf1.get_session(ano, gp, treino)
-                sess.load()
-                laps_sess = sess.laps
-                sessions_free.append(laps_sess)
-            except Exception:
-                continue
-        if not sessions_free:
-            return info_box, chart_card(px.bar(title="Sem dados suficientes para previsão de corrida!", template="plotly_dark"))
-        df_free = pd.concat(sessions_free)
-        df_free = df_free[df_free['LapTime'].notnull()]
-        if df_free.empty:
-            return info_box, chart_card(px.bar(title="Sem dados para este treino!", template="plotly_dark"))
-        best5 = df_free.groupby('Driver').apply(lambda x: x.nsmallest(5, 'LapTime')).reset_index(drop=True)
-        best5['LapTime_s'] = best5['LapTime'].dt.total_seconds()
-        team_race = best5.groupby('Team')['LapTime_s'].mean().reset_index().sort_values('LapTime_s')
-        leader_time = team_race['LapTime_s'].iloc[0]
-        team_race['Gap_lider'] = team_race['LapTime_s'] - leader_time
-        team_race['Gap_lider_str'] = team_race['Gap_lider'].apply(lambda x: "" if x == 0 else f"+{x:.3f}s")
-        color_team = [TEAM_COLORS.get(t, "#222") for t in team_race['Team']]
-        min_time = team_race['LapTime_s'].min()
-        max_time = team_race['LapTime_s'].max()
-        margin = (max_time - min_time) * 0.15 if (max_time - min_time) > 0 else 1
-        fig = px.bar(
-            team_race,
-            x='Team',
-            y='LapTime_s',
-            title="🔮 Força das Equipes na Corrida (gap p/ líder, médias dos TL)",
-            labels={'LapTime_s': 'Ritmo médio (s)'},
-            color='Team',
-            color_discrete_sequence=color_team,
-            text='Gap_lider_str',
-            template="plotly_dark"
-        )
-        fig.update_traces(
-            textposition='outside',
-            hovertemplate="Equipe: %{x}<br>Ritmo Médio: %{y:.3f}s<br>Gap p/ líder: %{text}"
-        )
-        fig.update_layout(
-            xaxis=dict(categoryorder="array", categoryarray=team_race['Team']),
-            yaxis=dict(range=[min_time - margin, max_time + margin]),
-            showlegend=False,
-            font=dict(size=15)
-        )
-        return info_box, chart_card(fig)
+        sessions_free, _ = load_sessions([(ano, gp, treino) for treino in ["FP1", "FP2", "FP3"]],
+                                         ANALISE_PERFIL["power_race"], loader=load_artifacts)
+        return power_race_figure([artifacts.laps for artifacts in sessions_free.values()], info_box)
 
     # ========== POWER_QUALIFY ==========
     if analysis == "power_qualify":
         try:
-            sess_qualy = fastf1.get_session(ano, gp, "Q")
-            sess_qualy.load()
-            laps_qualy = sess_qualy.laps
+            artifacts_qualy = load_artifacts(ano, gp, "Q", ANALISE_PERFIL["power_qualify"])
+            stage('aggregate')
+            best_laps_qualy = artifacts_qualy.best_laps
         except Exception:
-            return info_box, chart_card(px.bar(title="Sem dados de qualify para este GP!", template="plotly_dark"))
-        laps_qualy = laps_qualy[laps_qualy['LapTime'].notnull()]
-        if laps_qualy.empty:
-            return info_box, chart_card(px.bar(title="Sem dados de qualify para este GP!", template="plotly_dark"))
-        best_laps_qualy = laps_qualy.groupby('Driver').apply(lambda x: x.pick_fastest()).reset_index(drop=True)
-        best_laps_qualy['LapTime_s'] = best_laps_qualy['LapTime'].dt.total_seconds()
-        team_qualy = best_laps_qualy.groupby('Team')['LapTime_s'].mean().reset_index().sort_values('LapTime_s')
-        leader_time = team_qualy['LapTime_s'].iloc[0]
-        team_qualy['Gap_lider'] = team_qualy['LapTime_s'] - leader_time
+            raise AnaliseIndisponivel(info_box, "Sem dados de qualify para este GP!")
+        if best_laps_qualy.empty:
+            return info_box, px.bar(title="Sem dados de qualify para este GP!", template="plotly_dark")
+        team_qualy = team_gaps(best_laps_qualy)
         team_qualy['Gap_lider_str'] = team_qualy['Gap_lider'].apply(lambda x: "" if x == 0 else f"+{x:.3f}s")
         color_team = [TEAM_COLORS.get(t, "#222") for t in team_qualy['Team']]
         min_time = team_qualy['LapTime_s'].min()
         max_time = team_qualy['LapTime_s'].max()
         margin = (max_time - min_time) * 0.15 if (max_time - min_time) > 0 else 1
+        stage('figure')
         fig = px.bar(
             team_qualy,
             x='Team',
@@ -351,66 +904,37 @@ def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
             showlegend=False,
             font=dict(size=15)
         )
-        return info_box, chart_card(fig)
+        return info_box, fig
+
+    # ========== SEASON_TREND ==========
+    if analysis == "season_trend":
+        try:
+            table = update_season(ano)
+        except Exception:
+            raise AnaliseIndisponivel(info_box, "Erro ao carregar a temporada!")
+        stage('aggregate')
+        return season_trend_figure(team_pace_by_event(table), info_box)
 
     # ========== PITWINDOW ==========
     if analysis == "pitwindow":
         try:
-            session = fastf1.get_session(ano, gp, "R")
-            session.load()
-            try:
-                stints = session.laps.get_stints()
-            except Exception:
-                laps = session.laps
-                if laps.empty:
-                    return info_box, chart_card(px.bar(title="Sem dados de pit windows para esta corrida!", template="plotly_dark"))
-                all_stints = []
-                for driver, group in laps.groupby('Driver'):
-                    group = group.sort_values('LapNumber')
-                    stint_num = 1
-                    stint_start = None
-                    stint_compound = None
-                    prev_compound = None
-                    for i, row in group.iterrows():
-                        if stint_start is None:
-                            stint_start = row['LapNumber']
-                            stint_compound = row['Compound']
-                            prev_compound = row['Compound']
-                        if row['Compound'] != prev_compound:
-                            all_stints.append({
-                                'Driver': driver,
-                                'Stint': stint_num,
-                                'Compound': stint_compound,
-                                'Lap': stint_start,
-                                'StintTotalLaps': row['LapNumber'] - stint_start
-                            })
-                            stint_num += 1
-                            stint_start = row['LapNumber']
-                            stint_compound = row['Compound']
-                        prev_compound = row['Compound']
-                    if stint_start is not None:
-                        all_stints.append({
-                            'Driver': driver,
-                            'Stint': stint_num,
-                            'Compound': stint_compound,
-                            'Lap': stint_start,
-                            'StintTotalLaps': group['LapNumber'].max() - stint_start + 1
-                        })
-                stints = pd.DataFrame(all_stints)
+            artifacts_race = load_artifacts(ano, gp, "R", ANALISE_PERFIL["pitwindow"])
+            stage('aggregate')
+            stints = artifacts_race.stints
             if stints.empty:
-                return info_box, chart_card(px.bar(title="Sem dados de pit windows para esta corrida!", template="plotly_dark"))
-            stints = stints.sort_values(['Driver', 'Stint'])
+                return info_box, px.bar(title="Sem dados de pit windows para esta corrida!", template="plotly_dark")
+            stage('figure')
             fig = go.Figure()
-            for _, row in stints.iterrows():
-                color = TYRE_COLORS.get(str(row['Compound']).upper(), "#ccc")
+            for compound, grupo in stints.groupby('Compound', sort=False):
                 fig.add_trace(go.Bar(
-                    y=[row['Driver']],
-                    x=[row['StintTotalLaps']],
-                    base=[row['Lap']],
+                    y=grupo['Driver'],
+                    x=grupo['StintTotalLaps'],
+                    base=grupo['Lap'],
+                    customdata=grupo[['Stint', 'Lap', 'StintTotalLaps']].to_numpy(),
                     orientation='h',
-                    marker=dict(color=color, line=dict(width=0)),
-                    name=row['Compound'],
-                    hovertemplate=f"Piloto: {row['Driver']}<br>Stint: {row['Stint']}<br>Volta Inicial: {row['Lap']}<br>Duração: {row['StintTotalLaps']} voltas<br>Pneu: {row['Compound']}"
+                    marker=dict(color=TYRE_COLORS.get(compound.upper(), "#ccc"), line=dict(width=0)),
+                    name=compound,
+                    hovertemplate="Piloto: %{y}<br>Stint: %{customdata[0]}<br>Volta Inicial: %{customdata[1]}<br>Duração: %{customdata[2]} voltas<br>Pneu: " + compound
                 ))
             fig.update_layout(
                 barmode='stack',
@@ -420,38 +944,36 @@ def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
                 font=dict(size=15, color="#fafafc"),
                 template="plotly_dark",
                 showlegend=False,
+                yaxis=dict(categoryorder='array', categoryarray=sorted(stints['Driver'].unique())),
                 margin=dict(l=25, r=25, t=60, b=40),
                 plot_bgcolor="#181b21",
                 paper_bgcolor="#181b21"
             )
-            return info_box, chart_card(fig)
+            return info_box, fig
         except Exception:
-            return info_box, chart_card(px.bar(title="Sem dados de pit windows para esta corrida!", template="plotly_dark"))
+            raise AnaliseIndisponivel(info_box, "Sem dados de pit windows para esta corrida!")
 
     # ========== DEMAIS ANÁLISES ==========
     try:
-        session = fastf1.get_session(ano, gp, sessao)
-        session.load()
-        laps = session.laps
-        if laps.empty:
-            return info_box, chart_card(px.bar(title="Sem dados para esta sessão!", template="plotly_dark"))
+        artifacts = load_artifacts(ano, gp, sessao, ANALISE_PERFIL.get(analysis, PROFILE_LAPS))
+        if artifacts.laps.empty:
+            return info_box, px.bar(title="Sem dados para esta sessão!", template="plotly_dark")
     except Exception:
-        return info_box, chart_card(px.bar(title="Erro ao carregar dados dessa sessão!", template="plotly_dark"))
-
-    df = laps.copy()
-    if composto and len(composto) > 0:
-        df = df[df['Compound'].isin(composto)]
-    if pilotos and len(pilotos) > 0:
-        df = df[df['Driver'].isin(pilotos)]
-    best_laps = df.groupby('Driver').apply(lambda x: x.pick_fastest()).reset_index(drop=True)
-    best_laps['LapTime_s'] = best_laps['LapTime'].dt.total_seconds()
+        raise AnaliseIndisponivel(info_box, "Erro ao carregar dados dessa sessão!")
+
+    stage('aggregate')
+    df = artifacts.filtered(composto, pilotos)
+    best_laps = artifacts.best_laps if df is artifacts.laps else best_laps_per_driver(df)
     best_laps = best_laps.sort_values('LapTime_s')
     color_discrete_map = {t: TEAM_COLORS.get(t, "#222") for t in best_laps['Team'].unique()}
 
     if analysis == "bestlap":
         if best_laps.empty:
             fig = px.bar(title="Sem dados para esta sessão!", template="plotly_dark")
-            return info_box, chart_card(fig)
+            return info_box, fig
+        stage('figure')
+        # no hover vai o tempo já formatado
+        best_laps['LapTime'] = best_laps['LapTime_s'].map(format_time)
         fig = px.bar(
             best_laps, x='Driver', y='LapTime_s', color='Team',
             color_discrete_map=color_discrete_map, title="🏁 Melhor volta de cada piloto",
@@ -467,10 +989,16 @@ def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
             yaxis=dict(range=[min_time - margin, max_time + margin]),
             font=dict(size=17)
         )
-        return info_box, chart_card(fig)
+        return info_box, fig
 
     elif analysis == "stint":
-        stint_data = df.groupby(['Driver', 'Compound']).size().reset_index(name='Voltas')
+        stints = artifacts.stints
+        if composto:
+            stints = stints[stints['Compound'].isin(composto)]
+        if pilotos:
+            stints = stints[stints['Driver'].isin(pilotos)]
+        stint_data = stints.groupby(['Driver', 'Compound'], as_index=False)['Voltas'].sum()
+        stage('figure')
         fig = px.bar(
             stint_data, x='Driver', y='Voltas', color='Compound',
             color_discrete_map=TYRE_COLORS, barmode='stack',
@@ -480,14 +1008,13 @@ def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
         )
         fig.update_traces(textposition='outside')
         fig.update_layout(xaxis={'categoryorder':'array', 'categoryarray':best_laps['Driver']}, font=dict(size=17))
-        return info_box, chart_card(fig)
+        return info_box, fig
 
     elif analysis == "heatmap":
-        for sector in ['Sector1Time', 'Sector2Time', 'Sector3Time']:
-            best_laps[sector + '_s'] = best_laps[sector].dt.total_seconds()
         heatmap_data = best_laps.set_index('Driver')[['Sector1Time_s', 'Sector2Time_s', 'Sector3Time_s']]
         heatmap_data.columns = ['Setor 1', 'Setor 2', 'Setor 3']
         heatmap_data = heatmap_data.sort_values(by="Setor 1", ascending=True)
+        stage('figure')
         fig = px.imshow(
             heatmap_data, color_continuous_scale="plasma",
             labels={'color': 'Tempo (s)'},
@@ -505,38 +1032,139 @@ def buscar_dados(n_clicks, ano, gp, sessao, composto, pilotos, analysis):
             font=dict(size=15),
             margin=dict(t=60, l=60, r=30, b=40)
         )
-        return info_box, chart_card(fig)
+        return info_box, fig
+
+    elif analysis == "telemetria":
+        return info_box, telemetria_figure(artifacts, best_laps, pilotos)
 
     elif analysis == "ritmo":
-        fig = go.Figure()
-        if pilotos and len(pilotos) >= 2:
-            piloto1, piloto2 = pilotos[:2]
-            laps1 = df[df['Driver'] == piloto1]
-            laps2 = df[df['Driver'] == piloto2]
-            laps1 = laps1[laps1['LapTime'].notnull() & (laps1['PitInTime'].isnull())].sort_values('LapNumber')
-            laps2 = laps2[laps2['LapTime'].notnull() & (laps2['PitInTime'].isnull())].sort_values('LapNumber')
-            fig.add_trace(go.Scatter(
-                x=laps1['LapNumber'], y=laps1['LapTime'].dt.total_seconds(), mode='lines+markers',
-                name=f"{piloto1}",
-                marker=dict(color=TEAM_COLORS.get(laps1['Team'].iloc[0], "#222")) if not laps1.empty else {}
-            ))
-            fig.add_trace(go.Scatter(
-                x=laps2['LapNumber'], y=laps2['LapTime'].dt.total_seconds(), mode='lines+markers',
-                name=f"{piloto2}",
-                marker=dict(color=TEAM_COLORS.get(laps2['Team'].iloc[0], "#222")) if not laps2.empty else {}
-            ))
-            fig.update_layout(
-                title=f"📈 Ritmo: {piloto1} vs {piloto2}",
-                xaxis_title='Nº da Volta',
-                yaxis_title='Tempo da Volta (s)',
-                font=dict(size=15),
-                template="plotly_dark"
-            )
-        else:
-            fig.update_layout(title="Selecione pelo menos dois pilotos para comparar ritmo.", font=dict(size=15), template="plotly_dark")
-        return info_box, chart_card(fig)
+        return info_box, ritmo_figure(df, artifacts.pace.loc[df.index], best_laps, RITMO_OPCOES_PADRAO)
     else:
-        return info_box, chart_card(go.Figure(layout={"template": "plotly_dark"}))
+        return info_box, go.Figure(layout={"template": "plotly_dark"})
+
+def register_callbacks(app):
+    app.callback(
+        Output('gp-dropdown', 'options'), Output('gp-dropdown', 'value'),
+        Input('ano-dropdown', 'value'),
+    )(update_gp_options)
+    app.callback(
+        Output('sessao-dropdown', 'options'), Output('sessao-dropdown', 'value'),
+        Input('ano-dropdown', 'value'), Input('gp-dropdown', 'value'), Input('analysis-dropdown', 'value'),
+    )(update_session_options)
+    app.callback(
+        Output('sessao-dropdown', 'disabled'), Output('sessao-dropdown', 'placeholder'),
+        Input('analysis-dropdown', 'value'),
+    )(toggle_sessao_dropdown)
+    app.callback(
+        Output('ritmo-opcoes', 'style'),
+        Input('analysis-dropdown', 'value'),
+    )(ritmo_opcoes_style)
+    app.callback(
+        Output('pilot-dropdown', 'options'), Output('pilot-dropdown', 'value'),
+        Input('ano-dropdown', 'value'), Input('gp-dropdown', 'value'),
+        Input('sessao-dropdown', 'value'), Input('analysis-dropdown', 'value'),
+        State('pilot-dropdown', 'value')
+    )(update_pilot_options)
+    app.callback(
+        Output('info-box', 'children'),
+        Output('analysis-graph', 'figure'),
+        Output('session-laps', 'data'),
+        Output('client-view', 'data'),
+        Output('analysis-job', 'data'),
+        Input('buscar-btn', 'n_clicks'),
+        State('ano-dropdown', 'value'),
+        State('gp-dropdown', 'value'),
+        State('sessao-dropdown', 'value'),
+        State('compound-dropdown', 'value'),
+        State('pilot-dropdown', 'value'),
+        State('analysis-dropdown', 'value'),
+        State('client-view', 'data')
+    )(buscar_dados)
+    app.callback(
+        Output('info-box', 'children', allow_duplicate=True),
+        Output('analysis-graph', 'figure', allow_duplicate=True),
+        Output('job-progress', 'children'),
+        Output('job-poll', 'disabled'),
+        Output('job-rendered', 'data'),
+        Input('job-poll', 'n_intervals'),
+        Input('analysis-job', 'data'),
+        State('job-rendered', 'data'),
+        # roda também no carregamento da página: o job salvo na sessionStorage volta a ser acompanhado
+        prevent_initial_call='initial_duplicate'
+    )(acompanhar_job)
+    app.callback(
+        Output('live-tick', 'disabled'),
+        Output('live-view', 'data'),
+        Output('client-view', 'data', allow_duplicate=True),
+        Input('live-toggle', 'value'),
+        prevent_initial_call=True
+    )(alternar_ao_vivo)
+    app.callback(
+        Output('live-toggle', 'value'),
+        Input('buscar-btn', 'n_clicks'),
+        prevent_initial_call=True
+    )(sair_do_ao_vivo)
+    app.callback(
+        Output('info-box', 'children', allow_duplicate=True),
+        Output('analysis-graph', 'figure', allow_duplicate=True),
+        Output('live-view', 'data', allow_duplicate=True),
+        Input('live-tick', 'n_intervals'),
+        State('live-view', 'data'),
+        prevent_initial_call=True
+    )(atualizar_ao_vivo)
+    app.clientside_callback(
+        ClientsideFunction(namespace='f1', function_name='render_analysis'),
+        Output('analysis-graph', 'figure', allow_duplicate=True),
+        Input('client-view', 'data'),
+        Input('session-laps', 'data'),
+        Input('compound-dropdown', 'value'),
+        Input('pilot-dropdown', 'value'),
+        Input('ritmo-opcoes', 'value'),
+        State('client-config', 'data'),
+        prevent_initial_call=True
+    )
+
+def _timing_hooks(app):
+    # latência da primeira requisição de cada rota (a primeira do /_dash-update-component pega os caches frios)
+    app.first_request_seconds = {}
+
+    @app.server.before_request
+    def _inicio():
+        flask.g.inicio_requisicao = time.perf_counter()
+
+    @app.server.after_request
+    def _fim(response):
+        path = flask.request.path
+        if path not in app.first_request_seconds and hasattr(flask.g, 'inicio_requisicao'):
+            elapsed = time.perf_counter() - flask.g.inicio_requisicao
+            app.first_request_seconds[path] = elapsed
+            log.info("primeira requisição %s: %.3f s", path, elapsed)
+        return response
+
+def _metrics_route(app):
+    register_gauges('session_cache', session_cache.stats)
+    register_gauges('figure_cache', figure_cache.stats)
+    register_gauges('job_queue', job_queue.stats)
+    app.server.add_url_rule('/metrics', 'metrics', metrics_view)
+
+def create_app(warm=WARM_ON_BOOT):
+    if warm:
+        import warm as warmup
+        warmup.warm_caches()
+    app = dash.Dash(__name__, external_stylesheets=external_stylesheets)
+    app.title = "F1 Analyst"
+    app.layout = build_layout()
+    register_callbacks(app)
+    _timing_hooks(app)
+    _metrics_route(app)
+    app.boot_seconds = time.perf_counter() - BOOT_START
+    log.info("app pronto em %.3f s", app.boot_seconds)
+    return app
+
+def create_server():
+    # alvo do gunicorn: gunicorn "app:create_server()"
+    return create_app().server
 
 if __name__ == '__main__':
-    app.run(debug=True)
+    logging.basicConfig(level=logging.INFO)
+    create_app().run(debug=True)
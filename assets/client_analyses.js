@@ -0,0 +1,213 @@
+// Análises redesenhadas no navegador (Melhor Volta, Stints, Heatmap, Ritmo).
+// O servidor manda as voltas da sessão uma vez (session-laps) e os filtros de composto/piloto
+// são aplicados aqui, sem ida ao servidor. Espelha o build_analysis() do app.py.
+(function () {
+    function semDados(config, titulo) {
+        return {data: [], layout: {template: config.template, title: {text: titulo}}};
+    }
+
+    function corEquipe(config, equipe) {
+        return config.team_colors[equipe] || "#222";
+    }
+
+    function filtrarVoltas(ds, compostos, pilotos) {
+        const comp = compostos && compostos.length ? new Set(compostos) : null;
+        const pil = pilotos && pilotos.length ? new Set(pilotos) : null;
+        const idx = [];
+        for (let i = 0; i < ds.driver.length; i++) {
+            if (comp && !comp.has(ds.compounds[ds.compound[i]])) continue;
+            if (pil && !pil.has(ds.drivers[ds.driver[i]])) continue;
+            idx.push(i);
+        }
+        return idx;
+    }
+
+    function volta(ds, i) {
+        return {
+            driver: ds.drivers[ds.driver[i]], team: ds.team[i] >= 0 ? ds.teams[ds.team[i]] : null,
+            compound: ds.compounds[ds.compound[i]], lap: ds.lap[i], time: ds.time[i],
+            s1: ds.s1[i], s2: ds.s2[i], s3: ds.s3[i]
+        };
+    }
+
+    // mesmas regras do aggregations.best_laps_per_driver: só voltas marcadas como melhor pessoal,
+    // a primeira registrada em caso de empate; resultado ordenado pelo tempo
+    function melhoresVoltas(ds, idx) {
+        const melhor = new Map();
+        for (const i of idx) {
+            if (!ds.pb[i] || ds.time[i] === null) continue;
+            const atual = melhor.get(ds.driver[i]);
+            if (atual === undefined || ds.time[i] < ds.time[atual]) melhor.set(ds.driver[i], i);
+        }
+        return Array.from(melhor.values()).map(i => volta(ds, i)).sort((a, b) => a.time - b.time);
+    }
+
+    function formatarTempo(s) {
+        const ms = Math.round(s * 1000);
+        return Math.floor(ms / 1000) + "s" + String(ms % 1000).padStart(3, "0") + "ms";
+    }
+
+    function figBestlap(ds, idx, config) {
+        const bests = melhoresVoltas(ds, idx);
+        if (!bests.length) return semDados(config, "Sem dados para esta sessão!");
+        const porEquipe = new Map();
+        for (const b of bests) {
+            if (!porEquipe.has(b.team)) porEquipe.set(b.team, []);
+            porEquipe.get(b.team).push(b);
+        }
+        const data = Array.from(porEquipe, ([equipe, linhas]) => ({
+            type: "bar", name: equipe, x: linhas.map(b => b.driver), y: linhas.map(b => b.time),
+            customdata: linhas.map(b => [b.compound, formatarTempo(b.time)]),
+            marker: {color: corEquipe(config, equipe)},
+            hovertemplate: "Team=" + equipe + "<br>Driver=%{x}<br>Melhor Volta (s)=%{y}" +
+                "<br>Compound=%{customdata[0]}<br>LapTime=%{customdata[1]}<extra></extra>"
+        }));
+        const tempos = bests.map(b => b.time);
+        const min = Math.min(...tempos), max = Math.max(...tempos);
+        const margem = max - min > 0 ? (max - min) * 0.15 : 1;
+        return {data: data, layout: {
+            template: config.template, title: {text: "🏁 Melhor volta de cada piloto"}, barmode: "relative",
+            legend: {title: {text: "Team"}}, font: {size: 17},
+            xaxis: {title: {text: "Driver"}, categoryorder: "array", categoryarray: bests.map(b => b.driver)},
+            yaxis: {title: {text: "Melhor Volta (s)"}, range: [min - margem, max + margem]}
+        }};
+    }
+
+    function figStint(ds, idx, config) {
+        const ordem = melhoresVoltas(ds, idx).map(b => b.driver);
+        const contagem = new Map();
+        for (const i of idx) {
+            const comp = ds.compounds[ds.compound[i]];
+            if (!contagem.has(comp)) contagem.set(comp, new Map());
+            const porPiloto = contagem.get(comp);
+            const piloto = ds.drivers[ds.driver[i]];
+            porPiloto.set(piloto, (porPiloto.get(piloto) || 0) + 1);
+        }
+        const data = Array.from(contagem, ([comp, porPiloto]) => ({
+            type: "bar", name: comp, x: Array.from(porPiloto.keys()), y: Array.from(porPiloto.values()),
+            marker: {color: config.tyre_colors[comp]}, textposition: "outside",
+            hovertemplate: "Compound=" + comp + "<br>Driver=%{x}<br>Nº de Voltas=%{y}<extra></extra>"
+        }));
+        return {data: data, layout: {
+            template: config.template, title: {text: "📊 Stints por piloto e composto"}, barmode: "stack",
+            legend: {title: {text: "Compound"}}, font: {size: 17},
+            xaxis: {title: {text: "Driver"}, categoryorder: "array", categoryarray: ordem},
+            yaxis: {title: {text: "Nº de Voltas"}}
+        }};
+    }
+
+    function figHeatmap(ds, idx, config) {
+        const bests = melhoresVoltas(ds, idx);
+        if (!bests.length) return semDados(config, "Sem dados para esta sessão!");
+        bests.sort((a, b) => (a.s1 === null) - (b.s1 === null) || a.s1 - b.s1);
+        const pilotos = bests.map(b => b.driver);
+        return {data: [{
+            type: "heatmap", x: ["Setor 1", "Setor 2", "Setor 3"], y: pilotos,
+            z: bests.map(b => [b.s1, b.s2, b.s3]), coloraxis: "coloraxis",
+            texttemplate: "%{z:.3f}", textfont: {size: 15},
+            hovertemplate: "Piloto: %{y}<br>Setor: %{x}<br>Tempo: %{z:.3f} s<extra></extra>"
+        }], layout: {
+            template: config.template, title: {text: "🔥 Heatmap de tempos por setor"}, font: {size: 15},
+            coloraxis: {colorscale: "Plasma", colorbar: {title: {text: "Tempo (s)"}}},
+            xaxis: {constrain: "domain"},
+            yaxis: {autorange: "reversed", categoryorder: "array", categoryarray: pilotos},
+            margin: {t: 60, l: 60, r: 30, b: 40}
+        }};
+    }
+
+    // arrays tipados do servidor (aggregations.typed_array: {dtype: "f4", bdata: base64}),
+    // decodificados uma vez por dataset
+    const decodificados = new WeakMap();
+
+    function float32(arr) {
+        if (!arr || !arr.bdata) return arr;
+        if (!decodificados.has(arr)) {
+            const bin = atob(arr.bdata);
+            const bytes = new Uint8Array(bin.length);
+            for (let i = 0; i < bin.length; i++) bytes[i] = bin.charCodeAt(i);
+            decodificados.set(arr, new Float32Array(bytes.buffer));
+        }
+        return decodificados.get(arr);
+    }
+
+    function arredondar(v) {
+        return v === null || isNaN(v) ? null : Math.round(v * 1000) / 1000;
+    }
+
+    // mesmo gráfico do ritmo em build_analysis: todos os pilotos (ou os filtrados) em Scattergl,
+    // voltas limpas como pontos e a mediana móvel calculada no servidor (aggregations.rolling_pace)
+    // como linha; combustível e pneu descontados conforme as opções marcadas
+    function figRitmo(ds, idx, config, pilotos, opcoes) {
+        const pace = ds.pace;
+        opcoes = opcoes || [];
+        const comb = opcoes.includes("combustivel"), pneu = opcoes.includes("pneu");
+        const mediana = pace && opcoes.includes("mediana");
+        const serie = comb && pneu ? "fuel_tyre" : comb ? "fuel" : pneu ? "tyre" : "raw";
+        const med = mediana ? float32(pace.median[serie]) : null;
+        const porPiloto = new Map();
+        for (const i of idx) {
+            if (ds.time[i] === null || ds.pit[i]) continue;
+            if (!porPiloto.has(ds.driver[i])) porPiloto.set(ds.driver[i], []);
+            porPiloto.get(ds.driver[i]).push(i);
+        }
+        if (!porPiloto.size) return semDados(config, "Sem voltas para comparar ritmo.");
+        // ordem da legenda: melhor volta da sessão; a segunda dupla de cada equipe fica tracejada
+        const ordem = melhoresVoltas(ds, idx).map(b => ds.drivers.indexOf(b.driver)).filter(d => porPiloto.has(d));
+        for (const d of porPiloto.keys()) if (!ordem.includes(d)) ordem.push(d);
+        const vistas = new Set();
+        const data = [];
+        for (const d of ordem) {
+            const voltas = porPiloto.get(d).sort((a, b) => ds.lap[a] - ds.lap[b]);
+            const equipe = ds.team[voltas[0]] >= 0 ? ds.teams[ds.team[voltas[0]]] : null;
+            const cor = corEquipe(config, equipe);
+            const segundo = vistas.has(equipe);
+            vistas.add(equipe);
+            const piloto = ds.drivers[d];
+            const x = voltas.map(i => ds.lap[i]);
+            const y = voltas.map(i => {
+                let t = ds.time[i];
+                if (comb && pace) t -= pace.fuel_s_per_lap * (pace.last_lap - ds.lap[i]);
+                if (pneu && pace) t -= (pace.tyre_s_per_lap[ds.compounds[ds.compound[i]]] || 0) * (pace.tyre_life[i] - 1);
+                return arredondar(t);
+            });
+            data.push({
+                type: "scattergl", mode: mediana ? "markers" : "lines+markers", name: piloto, legendgroup: piloto,
+                showlegend: !mediana, x: x, y: y,
+                marker: {color: cor, size: mediana ? 5 : 6, opacity: mediana ? 0.35 : 1, symbol: segundo ? "diamond" : "circle"},
+                line: {color: cor, dash: segundo ? "dot" : "solid"},
+                hovertemplate: piloto + "<br>Volta %{x}<br>Tempo: %{y:.3f}s<extra></extra>"
+            });
+            if (mediana) {
+                data.push({
+                    type: "scattergl", mode: "lines", name: piloto, legendgroup: piloto, connectgaps: false,
+                    x: x, y: voltas.map(i => arredondar(med[i])),
+                    line: {color: cor, width: 2.5, dash: segundo ? "dot" : "solid"},
+                    hovertemplate: piloto + "<br>Volta %{x}<br>Mediana (" + pace.window + " voltas): %{y:.3f}s<extra></extra>"
+                });
+            }
+        }
+        const nomes = ordem.map(d => ds.drivers[d]);
+        let titulo = nomes.length === 2 ? "📈 Ritmo: " + nomes[0] + " vs " + nomes[1] : "📈 Ritmo de " + nomes.length + " pilotos";
+        const correcoes = [comb ? "combustível" : null, pneu ? "pneu" : null].filter(c => c);
+        if (correcoes.length) titulo += " (corrigido: " + correcoes.join(" e ") + ")";
+        return {data: data, layout: {
+            template: config.template, title: {text: titulo}, font: {size: 15}, hovermode: "closest",
+            xaxis: {title: {text: "Nº da Volta"}}, yaxis: {title: {text: "Tempo da Volta (s)"}},
+            legend: {font: {size: 12}}
+        }};
+    }
+
+    const FIGURAS = {bestlap: figBestlap, stint: figStint, heatmap: figHeatmap, ritmo: figRitmo};
+
+    window.dash_clientside = Object.assign({}, window.dash_clientside, {
+        f1: {
+            render_analysis: function (view, ds, compostos, pilotos, opcoes, config) {
+                const noUpdate = window.dash_clientside.no_update;
+                if (!view || !ds || !config || !FIGURAS[view.analysis]) return noUpdate;
+                if (JSON.stringify(view.session) !== JSON.stringify(ds.session)) return noUpdate;
+                const idx = filtrarVoltas(ds, compostos, pilotos);
+                return FIGURAS[view.analysis](ds, idx, config, pilotos, opcoes);
+            }
+        }
+    });
+})();
@@ -0,0 +1,106 @@
+# Compara o kernel vetorizado de aggregations.py com o código antigo baseado em groupby().apply()
+# numa temporada sintética (24 GPs x FP1/FP2/FP3/Q/R, 20 pilotos).
+#
+#   python benchmarks/bench_aggregations.py [--events 24]
+import argparse
+import os
+import sys
+import time
+import warnings
+
+import numpy as np
+import pandas as pd
+from fastf1.core import Laps
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+from aggregations import best_laps_per_driver, compact_laps, team_gaps, top_n_laps  # noqa: E402
+
+
+def synthetic_laps(seed, n_drivers=20, n_laps=60):
+    rng = np.random.default_rng(seed)
+    n = n_drivers * n_laps
+    driver = np.repeat([f"D{i:02d}" for i in range(n_drivers)], n_laps)
+    lap_s = 90 + np.repeat(rng.normal(0, 0.6, n_drivers), n_laps) + rng.gamma(2, 0.4, n)
+    lap_s[rng.random(n) < 0.03] = np.nan
+    lap_time = pd.to_timedelta(lap_s, unit='s')
+    df = pd.DataFrame({
+        'Driver': driver, 'Team': np.repeat([f"Team {i // 2}" for i in range(n_drivers)], n_laps),
+        'LapNumber': np.tile(np.arange(1, n_laps + 1), n_drivers).astype(float),
+        'LapTime': lap_time
+    })
+    running_best = df.groupby('Driver')['LapTime'].cummin()
+    df['IsPersonalBest'] = df['LapTime'].eq(running_best) & (rng.random(n) > 0.05)
+    return Laps(df)
+
+
+def reference_best(laps):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        best = laps.groupby('Driver').apply(lambda x: x.pick_fastest()).reset_index(drop=True)
+    # pick_fastest() devolve None para piloto sem volta válida e o apply vira uma linha toda NaN;
+    # o kernel simplesmente não gera a linha
+    best = best[best['Driver'].notna()].copy()
+    best['LapTime_s'] = best['LapTime'].dt.total_seconds()
+    return best
+
+
+def reference_top5(laps):
+    laps = laps[laps['LapTime'].notnull()]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        best5 = laps.groupby('Driver').apply(lambda x: x.nsmallest(5, 'LapTime')).reset_index(drop=True)
+    best5['LapTime_s'] = best5['LapTime'].dt.total_seconds()
+    return best5
+
+
+def reference_teams(df):
+    team = df.groupby('Team')['LapTime_s'].mean().reset_index().sort_values('LapTime_s')
+    team['Gap_lider'] = team['LapTime_s'] - team['LapTime_s'].iloc[0]
+    return team.reset_index(drop=True)
+
+
+def timed(fn, sessions):
+    start = time.perf_counter()
+    out = [fn(laps) for laps in sessions]
+    return time.perf_counter() - start, out
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--events', type=int, default=24)
+    args = parser.parse_args()
+    sessions = [synthetic_laps(seed) for seed in range(args.events * 5)]
+    n_laps = sum(len(s) for s in sessions)
+    print(f"{len(sessions)} sessões, {n_laps} voltas")
+
+    cases = [
+        ('melhor volta', reference_best, best_laps_per_driver, ['Driver', 'LapTime_s']),
+        ('top-5 voltas', reference_top5, top_n_laps, ['Driver', 'LapTime_s']),
+        ('média por equipe', lambda l: reference_teams(reference_best(l)),
+         lambda l: team_gaps(best_laps_per_driver(l)), ['Team', 'LapTime_s', 'Gap_lider']),
+    ]
+    for name, ref_fn, new_fn, cols in cases:
+        t_ref, ref = timed(ref_fn, sessions)
+        t_new, new = timed(new_fn, sessions)
+        for a, b in zip(ref, new):
+            a = a[cols].sort_values(cols).reset_index(drop=True)
+            b = b[cols].sort_values(cols).reset_index(drop=True)
+            pd.testing.assert_frame_equal(a, b, check_dtype=False)
+        print(f"{name:<18} apply: {t_ref * 1000:8.1f} ms   vetorizado: {t_new * 1000:8.1f} ms   ({t_ref / t_new:5.1f}x)")
+
+    # mesmas análises sobre as voltas compactas do cache (float32: iguais até o milissegundo)
+    compact = [compact_laps(laps) for laps in sessions]
+    for name, ref_fn, new_fn, cols in cases:
+        t_new, new = timed(new_fn, compact)
+        for laps, b in zip(sessions, new):
+            a = ref_fn(laps)[cols].sort_values(cols).reset_index(drop=True)
+            b = b[cols].sort_values(cols).reset_index(drop=True)
+            pd.testing.assert_frame_equal(a, b, check_dtype=False, check_exact=False, atol=1e-3)
+        print(f"{name:<18} compacto: {t_new * 1000:8.1f} ms")
+    raw_mb = sum(laps.memory_usage(deep=True).sum() for laps in sessions) / 1e6
+    compact_mb = sum(laps.memory_usage(deep=True).sum() for laps in compact) / 1e6
+    print(f"memória das voltas  Laps: {raw_mb:.1f} MB   compacto: {compact_mb:.1f} MB   ({raw_mb / compact_mb:.1f}x)")
+
+
+if __name__ == '__main__':
+    main()
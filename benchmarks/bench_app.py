@@ -0,0 +1,240 @@
+# Benchmark ponta a ponta do app com o fastf1 sintético (benchmarks/fake_fastf1.py), sem rede:
+# latência, pico de memória e tamanho da resposta de cada análise de ANALISES e dos callbacks
+# dos dropdowns, passando pelo endpoint do Dash como o navegador faz.
+#
+#   python benchmarks/bench_app.py [--repeat 3] [--save] [--compare] [--max-regression 0.2]
+#
+# Latência em três situações: fria (caches em memória e lap store vazios), sessão em cache (só o
+# cache de figuras vazio) e figura em cache. --save acrescenta o resultado, com o commit atual,
+# em benchmarks/results.jsonl; --compare compara com a última execução salva e termina com erro
+# se alguma métrica piorar mais que --max-regression.
+import argparse
+import json
+import os
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+import tracemalloc
+
+BENCH_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(BENCH_DIR)
+sys.path[:0] = [ROOT, BENCH_DIR]
+HISTORY = os.path.join(BENCH_DIR, 'results.jsonl')
+# métricas comparadas entre execuções (todas: quanto menor, melhor)
+TRACKED = ('cold_ms', 'session_ms', 'hit_ms', 'peak_mb', 'payload_kb')
+# abaixo disso a diferença é ruído do relógio, não regressão
+MIN_DELTA = {'cold_ms': 10.0, 'session_ms': 5.0, 'hit_ms': 5.0, 'peak_mb': 0.5, 'payload_kb': 1.0}
+
+
+def _setup_env():
+    # tudo em diretório temporário: o benchmark nunca lê nem suja os caches reais
+    tmp = tempfile.mkdtemp(prefix='f1bench-')
+    os.environ['F1_FASTF1_CACHE_DIR'] = os.path.join(tmp, 'fastf1_cache')
+    os.environ['F1_LAP_STORE_DIR'] = os.path.join(tmp, 'lapstore')
+    os.environ.setdefault('F1_SLOW_REQUEST_MS', '0')
+    return tmp
+
+
+def _split_output(key):
+    outputs = key[2:-2].split('...') if key.startswith('..') else [key]
+    specs = [dict(zip(('id', 'property'), out.rsplit('.', 1))) for out in outputs]
+    return specs if key.startswith('..') else specs[0]
+
+
+def dash_request(client, app, output, values):
+    # monta o POST de /_dash-update-component do callback cuja saída contém `output`
+    key = next(k for k in app.callback_map if output in k)
+    spec = app.callback_map[key]
+
+    def props(items):
+        return [{**item, 'value': values.get(f"{item['id']}.{item['property']}")} for item in items]
+
+    inputs = props(spec['inputs'])
+    body = {
+        'output': key, 'outputs': _split_output(key), 'inputs': inputs, 'state': props(spec['state']),
+        'changedPropIds': [f"{inputs[0]['id']}.{inputs[0]['property']}"]
+    }
+    response = client.post('/_dash-update-component', json=body)
+    if response.status_code not in (200, 204):
+        raise RuntimeError(f"{output}: HTTP {response.status_code}")
+    return response.get_data()
+
+
+def build_cases(app_module, ano, gp):
+    import fake_fastf1
+    pilotos = [driver for driver, *_ in fake_fastf1.DRIVERS[:2]]
+    base = {'ano-dropdown.value': ano, 'gp-dropdown.value': gp, 'compound-dropdown.value': [],
+            'pilot-dropdown.value': None, 'client-view.data': None, 'buscar-btn.n_clicks': 1}
+    cases = [
+        ('dropdown gp', 'gp-dropdown.options', {**base}),
+        ('dropdown sessão', 'sessao-dropdown.options', {**base, 'analysis-dropdown.value': 'bestlap'}),
+        ('dropdown pilotos', 'pilot-dropdown.options',
+         {**base, 'sessao-dropdown.value': 'R', 'analysis-dropdown.value': 'bestlap'}),
+    ]
+    for analise in app_module.ANALISES:
+        value = analise['value']
+        sessao = 'N/A' if value in app_module.ANALISES_SEM_SESSAO else 'R'
+        values = {**base, 'sessao-dropdown.value': sessao, 'analysis-dropdown.value': value}
+        if value == 'ritmo':
+            values['pilot-dropdown.value'] = pilotos
+        cases.append((value, 'info-box.children', values))
+    return cases
+
+
+def clear_caches(cold):
+    import lapstore
+    import schedule
+    from figure_cache import figure_cache
+    from jobs import job_queue
+    from sessions import session_cache
+    figure_cache.clear()
+    if cold:
+        # sem isso a passada fria reencontraria o job já terminado da passada anterior
+        job_queue.clear()
+        session_cache.clear()
+        with schedule._calendars_lock:
+            schedule._calendars.clear()
+        shutil.rmtree(lapstore.LAP_STORE_DIR, ignore_errors=True)
+
+
+def timed_ms(fn):
+    start = time.perf_counter()
+    out = fn()
+    return (time.perf_counter() - start) * 1000, out
+
+
+def wait_job(client, app, payload):
+    # análises em segundo plano: acompanha o job pelo mesmo callback do navegador até o fim,
+    # para a latência medida ser a da análise completa
+    job = json.loads(payload)['response'].get('analysis-job', {}).get('data')
+    if not job:
+        return payload
+    rendered = None
+    for n in range(100000):
+        body = dash_request(client, app, 'job-progress.children',
+                            {'job-poll.n_intervals': n, 'analysis-job.data': job, 'job-rendered.data': rendered})
+        response = json.loads(body)['response']
+        rendered = response.get('job-rendered', {}).get('data', rendered)
+        if 'analysis-graph' in response:
+            payload = body
+        if response['job-poll']['disabled']:
+            return payload
+        time.sleep(0.005)
+    raise RuntimeError(f"job {job['id']} não terminou")
+
+
+def run_case(client, app, output, values, repeat):
+    call = lambda: wait_job(client, app, dash_request(client, app, output, values))  # noqa: E731
+    cold, session, hit = [], [], []
+    payload = b''
+    for _ in range(repeat):
+        clear_caches(cold=True)
+        elapsed, payload = timed_ms(call)
+        cold.append(elapsed)
+        clear_caches(cold=False)
+        session.append(timed_ms(call)[0])
+        hit.append(timed_ms(call)[0])
+    # memória numa passada fria à parte: o tracemalloc deixa tudo mais lento
+    clear_caches(cold=True)
+    tracemalloc.start()
+    call()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        'cold_ms': round(statistics.median(cold), 2), 'session_ms': round(statistics.median(session), 2),
+        'hit_ms': round(statistics.median(hit), 2), 'peak_mb': round(peak / 1e6, 2),
+        'payload_kb': round(len(payload) / 1e3, 2)
+    }
+
+
+def git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], cwd=ROOT, capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def last_saved(path):
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as fh:
+        lines = [line for line in fh if line.strip()]
+    return json.loads(lines[-1]) if lines else None
+
+
+def compare(previous, current, max_regression):
+    regressions = []
+    for name, metrics in current['results'].items():
+        old = previous['results'].get(name)
+        if old is None:
+            continue
+        for metric in TRACKED:
+            before, after = old.get(metric), metrics.get(metric)
+            if not before or after is None:
+                continue
+            if after - before > MIN_DELTA[metric] and after > before * (1 + max_regression):
+                regressions.append(f"{name} {metric}: {before} -> {after} (+{(after / before - 1) * 100:.0f}%)")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ano', type=int, default=2024)
+    parser.add_argument('--gp', default='Bahrain Grand Prix')
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--save', action='store_true')
+    parser.add_argument('--compare', action='store_true')
+    parser.add_argument('--max-regression', type=float, default=0.2)
+    parser.add_argument('--history', default=HISTORY)
+    args = parser.parse_args()
+
+    tmp = _setup_env()
+    try:
+        # o fake importa o fastf1; fica fora do tempo de boot, que o app real não paga
+        import fake_fastf1
+        boot_start = time.perf_counter()
+        import app as app_module
+        app = app_module.create_app(warm=False)
+        boot_ms = (time.perf_counter() - boot_start) * 1000
+        fake_fastf1.install()
+        client = app.server.test_client()
+        first_ms = timed_ms(lambda: client.get('/'))[0]
+
+        results = {}
+        print(f"boot (import + create_app): {boot_ms:.1f} ms   primeira requisição /: {first_ms:.1f} ms")
+        print(f"{'caso':<18} {'fria':>10} {'sessão':>10} {'figura':>10} {'pico':>9} {'resposta':>10}")
+        for name, output, values in build_cases(app_module, args.ano, args.gp):
+            r = results[name] = run_case(client, app, output, values, args.repeat)
+            print(f"{name:<18} {r['cold_ms']:>7.1f} ms {r['session_ms']:>7.1f} ms {r['hit_ms']:>7.1f} ms "
+                  f"{r['peak_mb']:>6.1f} MB {r['payload_kb']:>7.1f} KB")
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+    current = {
+        'commit': git_commit(), 'date': time.strftime('%Y-%m-%dT%H:%M:%S'), 'python': sys.version.split()[0],
+        'repeat': args.repeat, 'boot_ms': round(boot_ms, 1), 'results': results
+    }
+    status = 0
+    if args.compare:
+        previous = last_saved(args.history)
+        if previous is None:
+            print("sem execução salva para comparar")
+        else:
+            regressions = compare(previous, current, args.max_regression)
+            print(f"comparando com {previous.get('commit')} ({previous.get('date')}): "
+                  f"{len(regressions)} regressões acima de {args.max_regression:.0%}")
+            for line in regressions:
+                print(f"  {line}")
+            status = 1 if regressions else 0
+    if args.save:
+        with open(args.history, 'a', encoding='utf-8') as fh:
+            fh.write(json.dumps(current) + '\n')
+    return status
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,170 @@
+# Exporta análises para arquivos estáticos (relatórios pós-corrida) sem passar pela interface:
+# a mesma figura que o "Buscar" monta (app.render_analysis), gravada como JSON do Plotly e/ou HTML.
+#
+#   python export.py --ano 2024 [--gp "Bahrain Grand Prix" ...] [--sessao Q R] [--analise bestlap ...]
+#                    [--pilotos VER LEC ...] [--saida export] [--formato json html] [--workers 4] [--force]
+#
+# Cada tarefa do pool de processos é uma sessão (um GP, nas análises sem seletor de sessão, ou a
+# temporada, no season_trend): o worker carrega as voltas uma vez e gera todas as análises pedidas
+# dela. Arquivos já exportados são pulados e cada arquivo é gravado de forma atômica, então uma
+# exportação interrompida continua de onde parou. Sessões ainda não encerradas ficam de fora.
+import argparse
+import json
+import logging
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import plotly.io as pio
+from plotly.utils import PlotlyJSONEncoder
+
+import app
+from schedule import get_season_calendar, session_is_final
+from season import season_complete
+
+log = logging.getLogger('f1analyst')
+
+FORMATOS = ('json', 'html')
+SESSOES_PADRAO = ['Q', 'R']
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_').lower()
+
+
+def output_base(saida, ano, gp, sessao, analysis, pilotos=None):
+    nome = '_'.join([analysis, *sorted(pilotos)]) if analysis == "ritmo" and pilotos else analysis
+    if analysis == "season_trend":
+        return os.path.join(saida, str(ano), _slug(nome))
+    partes = [saida, str(ano), _slug(gp)]
+    if analysis not in app.ANALISES_SEM_SESSAO:
+        partes.append(_slug(sessao))
+    return os.path.join(*partes, _slug(nome))
+
+
+def _write_atomic(path, text):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        fh.write(text)
+    os.replace(tmp, path)
+
+
+def _exported(base, formatos):
+    return all(os.path.exists(f"{base}.{formato}") for formato in formatos)
+
+
+def export_analysis(ano, gp, sessao, analysis, pilotos, base, formatos):
+    info_box, fig_json = app.render_analysis(ano, gp, sessao, [], pilotos, analysis)
+    if 'json' in formatos:
+        doc = {
+            'ano': ano, 'gp': gp, 'sessao': sessao, 'analysis': analysis, 'pilotos': pilotos or [],
+            'info': info_box, 'figure': json.loads(fig_json)
+        }
+        _write_atomic(f"{base}.json", json.dumps(doc, cls=PlotlyJSONEncoder))
+    if 'html' in formatos:
+        _write_atomic(f"{base}.html", pio.to_html(pio.from_json(fig_json), include_plotlyjs='cdn'))
+
+
+def run_task(task, formatos):
+    # uma tarefa = uma sessão (ou GP/temporada); as análises dela compartilham a mesma carga
+    ano, gp, sessao, itens = task
+    inicio = time.perf_counter()
+    feitos, erros = [], []
+    for analysis, pilotos, base in itens:
+        try:
+            export_analysis(ano, gp, sessao, analysis, pilotos, base, formatos)
+            feitos.append(base)
+        except app.AnaliseIndisponivel as exc:
+            erros.append((base, exc.titulo))
+        except Exception as exc:
+            erros.append((base, repr(exc)))
+    return task, feitos, erros, time.perf_counter() - inicio
+
+
+def plan_tasks(anos, gps, sessoes, analises, pilotos, saida, formatos, force=False):
+    # devolve (tarefas, pulados); só entram análises de sessões encerradas e ainda sem arquivo
+    tarefas, pulados = [], 0
+    por_sessao = [a for a in analises if a not in app.ANALISES_SEM_SESSAO]
+    por_gp = [a for a in analises if a in app.ANALISES_SEM_SESSAO and a != "season_trend"]
+
+    def pendentes(ano, gp, sessao, nomes, refazer=force):
+        nonlocal pulados
+        itens = []
+        for analysis in nomes:
+            base = output_base(saida, ano, gp, sessao, analysis, pilotos)
+            if not refazer and _exported(base, formatos):
+                pulados += 1
+                continue
+            itens.append((analysis, pilotos if analysis == "ritmo" else None, base))
+        if itens:
+            tarefas.append((ano, gp, sessao, itens))
+
+    for ano in anos:
+        cal = get_season_calendar(ano)
+        for gp, disputadas in cal.events:
+            if gps and gp not in gps:
+                continue
+            for sessao in sessoes:
+                if sessao in disputadas and session_is_final(ano, gp, sessao):
+                    pendentes(ano, gp, sessao, por_sessao)
+            prontas = [a for a in por_gp if session_is_final(ano, gp, app.SESSAO_DA_ANALISE[a])]
+            pendentes(ano, gp, "N/A", prontas)
+        if "season_trend" in analises:
+            # com a temporada em andamento o gráfico muda a cada etapa, então é sempre regerado
+            pendentes(ano, None, "N/A", ["season_trend"], refazer=force or not season_complete(ano))
+    return tarefas, pulados
+
+
+def export(tarefas, formatos, workers):
+    resultados = []
+    if workers <= 1:
+        for task in tarefas:
+            resultados.append(run_task(task, formatos))
+            _log_task(resultados[-1])
+        return resultados
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [pool.submit(run_task, task, formatos) for task in tarefas]
+        for future in as_completed(futures):
+            resultados.append(future.result())
+            _log_task(resultados[-1])
+    return resultados
+
+
+def _log_task(resultado):
+    (ano, gp, sessao, _), feitos, erros, elapsed = resultado
+    log.info("export: %s %s %s: %d arquivo(s) em %.1f s", ano, gp or "temporada", sessao, len(feitos), elapsed)
+    for base, erro in erros:
+        log.warning("export: %s falhou: %s", base, erro)
+
+
+def main():
+    valores = [analise['value'] for analise in app.ANALISES]
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ano', type=int, nargs='+', required=True)
+    parser.add_argument('--gp', nargs='*', default=None)
+    parser.add_argument('--sessao', nargs='*', default=SESSOES_PADRAO)
+    parser.add_argument('--analise', nargs='*', choices=valores, default=None)
+    parser.add_argument('--pilotos', nargs='+', default=None)
+    parser.add_argument('--saida', default='export')
+    parser.add_argument('--formato', nargs='+', choices=FORMATOS, default=list(FORMATOS))
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+
+    analises = args.analise or valores
+    inicio = time.perf_counter()
+    tarefas, pulados = plan_tasks(args.ano, args.gp, args.sessao, analises, args.pilotos, args.saida, args.formato,
+                                  args.force)
+    resultados = export(tarefas, args.formato, args.workers)
+    feitos = sum(len(r[1]) for r in resultados)
+    erros = sum(len(r[2]) for r in resultados)
+    print(f"{feitos} exportada(s), {pulados} já existia(m), {erros} com erro, "
+          f"{len(tarefas)} tarefa(s) em {time.perf_counter() - inicio:.1f} s")
+    return 1 if erros else 0
+
+
+if __name__ == '__main__':
+    raise SystemExit(main())
@@ -0,0 +1,62 @@
+import os
+import threading
+import time
+from collections import OrderedDict
+
+FIGURE_CACHE_MAX_MB = int(os.environ.get('F1_FIGURE_CACHE_MB', '128'))
+
+
+class FigureCache:
+    # figuras já serializadas (JSON do plotly) por filtro normalizado; LRU por tamanho e TTL opcional
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_used = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[2] is not None and time.monotonic() >= entry[2]:
+                self._entries.pop(key)
+                self.bytes_used -= entry[1]
+                entry = None
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0]
+
+    def put(self, key, value, ttl=None, size=None):
+        if size is None:
+            size = sum(len(v) for v in value if isinstance(v, (str, bytes)))
+        expires_at = None if ttl is None else time.monotonic() + ttl
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes_used -= old[1]
+            self._entries[key] = (value, size, expires_at)
+            self.bytes_used += size
+            while self.bytes_used > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size, _) = self._entries.popitem(last=False)
+                self.bytes_used -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self.bytes_used, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions
+            }
+
+
+figure_cache = FigureCache(FIGURE_CACHE_MAX_MB * 1024 * 1024)
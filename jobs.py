@@ -0,0 +1,156 @@
+import hashlib
+import json
+import os
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from lapstore import LAP_STORE_DIR
+
+JOB_WORKERS = int(os.environ.get('F1_JOB_WORKERS', '2'))
+JOB_RESULT_TTL = float(os.environ.get('F1_JOB_TTL', '600'))
+# andamento e resultado final dos jobs em disco, por chave: com vários workers do gunicorn o
+# job roda só em um deles e os outros acompanham por aqui, sem refazer a análise
+JOB_SHARED_DIR = os.path.join(LAP_STORE_DIR, 'jobs')
+
+
+class Job:
+    # análise rodando fora da thread da requisição; a função recebe o próprio job e chama
+    # report() com o progresso e, quando houver, um resultado parcial
+    def __init__(self, key, publish=None):
+        self.id = uuid.uuid4().hex
+        self.key = key
+        self.status = 'queued'
+        self.progress = 0.0
+        self.message = ''
+        self.result = None
+        self.error = None
+        self.version = 0
+        self.finished_at = None
+        self._publish = publish
+        self._lock = threading.Lock()
+
+    def report(self, progress, message, result=None):
+        with self._lock:
+            self.progress = progress
+            self.message = message
+            if result is not None:
+                self.result = result
+                self.version += 1
+        self.publish()
+
+    def _finish(self, status, result=None, error=None):
+        with self._lock:
+            self.status = status
+            self.progress = 1.0
+            if result is not None:
+                self.result = result
+                self.version += 1
+            self.error = error
+            self.finished_at = time.monotonic()
+        self.publish()
+
+    def publish(self):
+        # repassa o estado para quem o compartilha (ver save_shared); falha aqui não derruba o job
+        if self._publish is None:
+            return
+        try:
+            self._publish(self.snapshot())
+        except Exception:
+            pass
+
+    def snapshot(self):
+        with self._lock:
+            return {
+                'id': self.id, 'status': self.status, 'progress': self.progress, 'message': self.message,
+                'result': self.result, 'error': self.error, 'version': self.version
+            }
+
+
+class JobQueue:
+    # um job por chave: quem pede a mesma análise enquanto ela roda (ou logo depois, dentro do
+    # TTL) recebe o mesmo job, o que também cobre o navegador que reconecta
+    def __init__(self, workers, ttl):
+        self.workers = workers
+        self.ttl = ttl
+        self._pool = None
+        self._jobs = {}
+        self._by_key = {}
+        self._lock = threading.Lock()
+
+    def _expire(self):
+        agora = time.monotonic()
+        for job_id, job in list(self._jobs.items()):
+            if job.finished_at is not None and agora - job.finished_at > self.ttl:
+                del self._jobs[job_id]
+                if self._by_key.get(job.key) is job:
+                    del self._by_key[job.key]
+
+    def submit(self, key, fn, publish=None):
+        with self._lock:
+            self._expire()
+            job = self._by_key.get(key)
+            if job is not None and job.status != 'error':
+                return job
+            job = Job(key, publish)
+            self._jobs[job.id] = job
+            self._by_key[key] = job
+            if self._pool is None:
+                self._pool = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='f1-job')
+        # publicado antes de responder o Buscar: o próximo poll pode cair em outro worker
+        job.publish()
+        self._pool.submit(self._run, job, fn)
+        return job
+
+    def _run(self, job, fn):
+        with job._lock:
+            job.status = 'running'
+        try:
+            job._finish('done', result=fn(job))
+        except Exception as exc:
+            job._finish('error', error=exc)
+
+    def get(self, job_id):
+        with self._lock:
+            self._expire()
+            return self._jobs.get(job_id)
+
+    def clear(self):
+        # esquece os jobs (os que estão rodando terminam, mas ninguém mais os encontra)
+        with self._lock:
+            self._jobs.clear()
+            self._by_key.clear()
+
+    def stats(self):
+        with self._lock:
+            ativos = sum(1 for job in self._jobs.values() if job.status in ('queued', 'running'))
+            return {'jobs': len(self._jobs), 'active': ativos}
+
+
+def _shared_path(key):
+    return os.path.join(JOB_SHARED_DIR, f"{hashlib.sha1(repr(key).encode()).hexdigest()}.json")
+
+
+def save_shared(key, doc, ttl=JOB_RESULT_TTL):
+    # grava de forma atômica; ttl None = não expira (resultado de sessão encerrada)
+    path = _shared_path(key)
+    os.makedirs(JOB_SHARED_DIR, exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    with open(tmp, 'w', encoding='utf-8') as fh:
+        json.dump({**doc, 'expira': None if ttl is None else time.time() + ttl}, fh)
+    os.replace(tmp, path)
+
+
+def load_shared(key):
+    try:
+        with open(_shared_path(key), encoding='utf-8') as fh:
+            doc = json.load(fh)
+    except (OSError, ValueError):
+        return None
+    if doc.get('expira') is not None and time.time() > doc['expira']:
+        return None
+    return doc
+
+
+job_queue = JobQueue(JOB_WORKERS, JOB_RESULT_TTL)
@@ -0,0 +1,101 @@
+import os
+import re
+from importlib.metadata import version
+
+import pandas as pd
+
+from aggregations import compact_laps
+
+try:
+    import pyarrow as pa
+except ImportError:  # sem pyarrow o lap store fica desligado e tudo passa pelo fastf1
+    pa = None
+
+LAP_STORE_DIR = os.environ.get('F1_LAP_STORE_DIR', './fastf1_cache/lapstore')
+# incrementar ao mudar LAP_COLUMNS ou o formato; a versão do fastf1 também entra no caminho,
+# então atualizar o fastf1 invalida o store inteiro sem precisar apagar nada.
+# v2: voltas em formato compacto (aggregations.compact_laps), lidas de volta já compactas
+LAP_STORE_SCHEMA = 2
+# lida dos metadados do pacote, sem importar o fastf1 (ver sessions.get_fastf1)
+FASTF1_VERSION = version('fastf1')
+LAP_COLUMNS = [
+    'Time', 'Driver', 'DriverNumber', 'Team', 'LapNumber', 'Stint', 'Compound', 'TyreLife', 'FreshTyre',
+    'LapTime', 'Sector1Time', 'Sector2Time', 'Sector3Time', 'PitInTime', 'PitOutTime',
+    'LapStartTime', 'TrackStatus', 'Position', 'IsPersonalBest', 'Deleted', 'IsAccurate'
+]
+
+
+def store_version():
+    return f"v{LAP_STORE_SCHEMA}-fastf1-{FASTF1_VERSION}"
+
+
+def _slug(text):
+    return re.sub(r'[^0-9A-Za-z]+', '_', str(text)).strip('_').lower()
+
+
+def store_path(key):
+    ano, gp, sessao = key
+    return os.path.join(LAP_STORE_DIR, store_version(), str(ano), _slug(gp), f"{_slug(sessao)}.arrow")
+
+
+def _stored_parts(schema):
+    meta = schema.metadata or {}
+    return set(meta.get(b'parts', b'').decode().split(','))
+
+
+def has_laps(key, parts):
+    if pa is None or not os.path.exists(store_path(key)):
+        return False
+    try:
+        with pa.memory_map(store_path(key), 'r') as source:
+            return set(parts) <= _stored_parts(pa.ipc.open_file(source).schema)
+    except (OSError, pa.ArrowInvalid):
+        return False
+
+
+def read_laps(key, parts):
+    table = read_table(store_path(key))
+    if table is None or not set(parts) <= _stored_parts(table.schema):
+        return None
+    return table.to_pandas()
+
+
+def write_laps(key, laps, parts):
+    if pa is None or laps is None or laps.empty or has_laps(key, parts):
+        return
+    cols = [c for c in LAP_COLUMNS if c in laps.columns]
+    df = compact_laps(pd.DataFrame(laps[cols]))
+    write_table(store_path(key), df, {b'parts': ','.join(sorted(parts)).encode()})
+
+
+def read_table(path):
+    if pa is None or not os.path.exists(path):
+        return None
+    try:
+        with pa.memory_map(path, 'r') as source:
+            return pa.ipc.open_file(source).read_all()
+    except (OSError, pa.ArrowInvalid):
+        return None
+
+
+def write_table(path, df, metadata=None):
+    # grava um DataFrame como Arrow IPC de forma atômica (tmp + os.replace); usado também pela
+    # tabela de agregados da temporada (season.py)
+    if pa is None:
+        return False
+    try:
+        table = pa.Table.from_pandas(df, preserve_index=False)
+    except (pa.ArrowInvalid, pa.ArrowTypeError):
+        return False
+    table = table.replace_schema_metadata({
+        **(table.schema.metadata or {}), **(metadata or {}),
+        b'version': store_version().encode()
+    })
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp = f"{path}.{os.getpid()}.tmp"
+    # sem compressão para o arquivo poder ser lido via mmap sem cópia dos buffers
+    with pa.OSFile(tmp, 'wb') as sink:
+        with pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table)
+    os.replace(tmp, path)
+    return True
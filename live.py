@@ -0,0 +1,254 @@
+# Modo ao vivo: lê o arquivo do live timing da F1 no formato em que o fastf1 grava
+# (python -m fastf1.livetiming save arquivo.txt) e acompanha a sessão sem chamar session.load().
+# Cada tick lê só as linhas novas do arquivo, fecha as voltas completadas desde o tick anterior e
+# atualiza melhores voltas, melhores setores e stints de forma incremental.
+#
+# Com F1_LIVE_REPLAY_SPEED > 0 o mesmo arquivo é reproduzido como uma gravação, no ritmo dos
+# timestamps das mensagens (x a velocidade), para testar sem sessão acontecendo.
+import json
+import math
+import os
+import threading
+import time
+
+import pandas as pd
+
+LIVE_FILE = os.environ.get('F1_LIVE_FILE', '')
+LIVE_REPLAY_SPEED = float(os.environ.get('F1_LIVE_REPLAY_SPEED', '0'))
+LIVE_POLL_MS = int(os.environ.get('F1_LIVE_POLL_MS', '2000'))
+# só essas categorias interessam; as demais (CarData.z, Position.z...) são puladas sem parse
+CATEGORIES = ('TimingData', 'TimingAppData', 'DriverList', 'SessionInfo')
+_PREFIXOS = tuple(f"['{cat}'" for cat in CATEGORIES) + tuple(f'["{cat}"' for cat in CATEGORIES)
+
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def parse_line(linha):
+    # (categoria, mensagem, timestamp) de uma linha gravada, ou None se não for de interesse;
+    # as linhas vêm como repr de Python (aspas simples, True/False), igual ao _fix_json do fastf1
+    linha = linha.strip()
+    if not linha.startswith(_PREFIXOS):
+        return None
+    try:
+        cat, msg, ts = json.loads(linha.replace("'", '"').replace('True', 'true').replace('False', 'false'))
+        return cat, msg, pd.Timestamp(ts)
+    except (ValueError, TypeError):
+        return None
+
+
+def lap_seconds(valor):
+    # '1:32.456' ou '32.456' -> segundos; vazio ou inválido -> NaN
+    try:
+        minutos, _, segundos = str(valor).rpartition(':')
+        return int(minutos or 0) * 60 + float(segundos)
+    except ValueError:
+        return math.nan
+
+
+def _items(valor):
+    # o feed manda listas no estado inicial e dicionários {'índice': ...} nas atualizações
+    if isinstance(valor, list):
+        return enumerate(valor)
+    if isinstance(valor, dict):
+        return ((int(k), v) for k, v in valor.items() if str(k).isdigit())
+    return ()
+
+
+class LiveFeed:
+    # lê o arquivo de forma incremental (o offset fica no file handle); uma linha ainda sendo
+    # escrita fica no buffer até chegar o fim dela
+    def __init__(self, path, speed=0.0):
+        self.path = path
+        self.speed = speed
+        self._fh = None
+        self._buffer = ''
+        self._proxima = None
+        self._inicio = None
+
+    def _linha(self):
+        if self._fh is None:
+            try:
+                self._fh = open(self.path, encoding='utf-8', errors='replace')
+            except OSError:
+                return None
+        linha = self._fh.readline()
+        if not linha.endswith('\n'):
+            self._buffer += linha
+            return None
+        linha, self._buffer = self._buffer + linha, ''
+        return linha
+
+    def _mensagem(self):
+        # próxima mensagem de interesse já escrita no arquivo, ou None
+        while True:
+            linha = self._linha()
+            if linha is None:
+                return None
+            msg = parse_line(linha)
+            if msg is not None:
+                return msg
+
+    def read(self):
+        # mensagens novas desde a última leitura; na reprodução de uma gravação, só as que o
+        # relógio da reprodução (que começa na primeira leitura) já alcançou
+        agora = time.monotonic()
+        mensagens = []
+        while True:
+            msg, self._proxima = self._proxima or self._mensagem(), None
+            if msg is None:
+                return mensagens
+            if self.speed > 0:
+                if self._inicio is None:
+                    self._inicio = (agora, msg[2])
+                if msg[2] > self._inicio[1] + pd.Timedelta(seconds=(agora - self._inicio[0]) * self.speed):
+                    self._proxima = msg
+                    return mensagens
+            mensagens.append(msg)
+
+
+class LiveSession:
+    # estado da sessão ao vivo montado só a partir das mensagens novas de cada tick.
+    # laps é um log só de acréscimos: a posição de cada piloto e de cada stint nos traços do
+    # gráfico segue a ordem em que apareceram no log, então um cliente que já viu as primeiras
+    # n voltas recebe só as mudanças de laps[n:] (ver app.live_patch)
+    def __init__(self, feed):
+        self.feed = feed
+        self.evento = ''
+        self.sessao = ''
+        self.laps = []
+        self.bests = {}
+        self.sector_bests = [(math.nan, None)] * 3
+        self.stints = {}
+        self.first_seen = {}
+        self.stint_first = {}
+        # muda quando uma melhor volta de piloto ou um melhor setor é batido
+        self.info_version = 0
+        self._pilotos = {}
+        self._linhas = {}
+        self._t0 = None
+        self.lock = threading.RLock()
+
+    def poll(self):
+        # lê o feed e devolve as voltas completadas desde o tick anterior
+        with self.lock:
+            novas = []
+            for cat, msg, ts in self.feed.read():
+                if self._t0 is None:
+                    self._t0 = ts
+                if isinstance(msg, dict):
+                    getattr(self, f"_on_{cat}")(msg, ts, novas)
+            for lap in novas:
+                self._add_lap(lap)
+            return novas
+
+    def _on_SessionInfo(self, msg, ts, novas):
+        self.evento = (msg.get('Meeting') or {}).get('Name', self.evento)
+        self.sessao = msg.get('Name', self.sessao)
+
+    def _on_DriverList(self, msg, ts, novas):
+        for num, info in msg.items():
+            if isinstance(info, dict):
+                piloto = self._pilotos.setdefault(str(num), {'Tla': str(num), 'TeamName': ''})
+                piloto.update({k: info[k] for k in ('Tla', 'TeamName') if k in info})
+
+    def _linha(self, num):
+        return self._linhas.setdefault(str(num), {
+            'voltas': 0, 'setores': [math.nan] * 3, 'ultima': math.nan,
+            'in_pit': False, 'pit_out': False, 'stints': {}
+        })
+
+    def _on_TimingAppData(self, msg, ts, novas):
+        for num, dados in (msg.get('Lines') or {}).items():
+            stints = self._linha(num)['stints']
+            for i, stint in _items(dados.get('Stints')):
+                if isinstance(stint, dict):
+                    stints.setdefault(i, {}).update(stint)
+
+    def _on_TimingData(self, msg, ts, novas):
+        for num, dados in (msg.get('Lines') or {}).items():
+            linha = self._linha(num)
+            for i, setor in _items(dados.get('Sectors')):
+                if i < 3 and isinstance(setor, dict) and setor.get('Value'):
+                    linha['setores'][i] = lap_seconds(setor['Value'])
+            # entrada no box durante a volta marca a volta de entrada; a saída, a volta seguinte
+            linha['in_pit'] |= dados.get('InPit') is True
+            linha['pit_out'] |= dados.get('PitOut') is True
+            ultima = dados.get('LastLapTime')
+            if isinstance(ultima, dict) and 'Value' in ultima:
+                linha['ultima'] = lap_seconds(ultima['Value'])
+            voltas = dados.get('NumberOfLaps')
+            if isinstance(voltas, int) and voltas > linha['voltas']:
+                linha['voltas'] = voltas
+                novas.append(self._fechar_volta(str(num), linha, ts))
+
+    def _fechar_volta(self, num, linha, ts):
+        piloto = self._pilotos.get(num, {'Tla': num, 'TeamName': ''})
+        stint_idx = max(linha['stints'], default=None)
+        stint = linha['stints'].get(stint_idx, {})
+        s1, s2, s3 = linha['setores']
+        lap = {
+            'Driver': piloto['Tla'], 'Team': piloto['TeamName'], 'LapNumber': linha['voltas'],
+            'Stint': (stint_idx or 0) + 1, 'Compound': str(stint.get('Compound') or 'UNKNOWN').upper(),
+            'TyreLife': stint.get('TotalLaps', math.nan), 'LapTime_s': linha['ultima'],
+            'Sector1Time_s': s1, 'Sector2Time_s': s2, 'Sector3Time_s': s3,
+            'PitIn': linha['in_pit'], 'PitOut': linha['pit_out'],
+            'SessionTime_s': (ts - self._t0).total_seconds()
+        }
+        linha.update(setores=[math.nan] * 3, ultima=math.nan, in_pit=False, pit_out=False)
+        return lap
+
+    def _add_lap(self, lap):
+        i = len(self.laps)
+        self.laps.append(lap)
+        driver = lap['Driver']
+        self.first_seen.setdefault(driver, i)
+        key = (driver, lap['Stint'])
+        if key in self.stints:
+            self.stints[key]['StintTotalLaps'] += 1
+        else:
+            self.stints[key] = {'Compound': lap['Compound'], 'Lap': lap['LapNumber'], 'StintTotalLaps': 1}
+            self.stint_first[key] = i
+        # melhores setores de todas as voltas, como aggregations.sector_bests
+        for s in range(3):
+            tempo = lap[f"Sector{s + 1}Time_s"]
+            if not math.isnan(tempo) and not tempo >= self.sector_bests[s][0]:
+                self.sector_bests[s] = (tempo, driver)
+                self.info_version += 1
+        best = self.bests.get(driver)
+        if is_clean(lap) and (best is None or lap['LapTime_s'] < best['LapTime_s']):
+            self.bests[driver] = lap
+            self.info_version += 1
+
+    def sector_frame(self):
+        # mesmo formato de aggregations.sector_bests, para o app.sector_info_box
+        return pd.DataFrame([
+            {'Sector': f"Sector{s + 1}Time", 'Driver': driver, 'Time': None if driver is None else tempo}
+            for s, (tempo, driver) in enumerate(self.sector_bests)
+        ])
+
+    def driver_order(self):
+        return sorted(self.first_seen, key=self.first_seen.get)
+
+    def stint_slots(self):
+        # stints de cada composto na ordem em que apareceram (= posição no traço de barras)
+        slots = {}
+        for key in sorted(self.stint_first, key=self.stint_first.get):
+            slots.setdefault(self.stints[key]['Compound'], []).append(key)
+        return slots
+
+
+def is_clean(lap):
+    # voltas que entram nas melhores voltas e no gráfico de tempos: com tempo e fora do box
+    return not (math.isnan(lap['LapTime_s']) or lap['PitIn'] or lap['PitOut'])
+
+
+def get_live_session(path=None, speed=None):
+    # uma sessão ao vivo por arquivo neste processo, compartilhada por todos os navegadores
+    path = path or LIVE_FILE
+    speed = LIVE_REPLAY_SPEED if speed is None else speed
+    with _sessions_lock:
+        live = _sessions.get((path, speed))
+        if live is None:
+            live = _sessions[(path, speed)] = LiveSession(LiveFeed(path, speed))
+        return live
@@ -0,0 +1,173 @@
+import contextvars
+import functools
+import json
+import logging
+import os
+import threading
+import time
+
+# estágios de cada callback (load -> aggregate -> figure -> serialize) em histogramas, expostos
+# no formato texto do Prometheus em /metrics; requisições acima de F1_SLOW_REQUEST_MS vão para o
+# log 'f1analyst.slow' com o tempo de cada estágio
+SLOW_REQUEST_MS = float(os.environ.get('F1_SLOW_REQUEST_MS', '0'))
+SECONDS_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60)
+BYTES_BUCKETS = (1e3, 1e4, 5e4, 1e5, 2.5e5, 5e5, 1e6, 2.5e6, 5e6, 1e7)
+
+slow_log = logging.getLogger('f1analyst.slow')
+
+
+class Histogram:
+    def __init__(self, name, help_text, labels, buckets):
+        self.name = name
+        self.help_text = help_text
+        self.labels = labels
+        self.buckets = buckets
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(label, '')) for label in self.labels)
+        with self._lock:
+            series = self._series.get(key)
+            if series is None:
+                series = self._series[key] = [[0] * len(self.buckets), 0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[0][i] += 1
+            series[1] += value
+            series[2] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.help_text}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            items = sorted((key, (list(s[0]), s[1], s[2])) for key, s in self._series.items())
+        for key, (counts, total, count) in items:
+            base = ','.join(f'{label}="{_escape(value)}"' for label, value in zip(self.labels, key))
+            sep = ',' if base else ''
+            for bound, n in zip(self.buckets, counts):
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{bound:g}"}} {n}')
+            lines.append(f'{self.name}_bucket{{{base}{sep}le="+Inf"}} {count}')
+            lines.append(f'{self.name}_sum{{{base}}} {total:.6f}')
+            lines.append(f'{self.name}_count{{{base}}} {count}')
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+callback_seconds = Histogram(
+    'f1_callback_seconds', 'Duração total do callback', ('callback', 'branch', 'cache'), SECONDS_BUCKETS)
+stage_seconds = Histogram(
+    'f1_stage_seconds', 'Duração de cada estágio do callback', ('callback', 'branch', 'stage'), SECONDS_BUCKETS)
+payload_bytes = Histogram(
+    'f1_payload_bytes', 'Tamanho da resposta do callback (JSON)', ('callback', 'branch'), BYTES_BUCKETS)
+HISTOGRAMS = [callback_seconds, stage_seconds, payload_bytes]
+
+# fontes de gauges lidas a cada scrape (ex.: stats() dos caches): nome -> função que devolve um dict
+_gauge_sources = {}
+COUNTER_STATS = ('hits', 'misses', 'evictions')
+
+
+def register_gauges(prefix, stats_fn):
+    _gauge_sources[prefix] = stats_fn
+
+
+class Trace:
+    def __init__(self, callback):
+        self.callback = callback
+        self.tags = {'branch': '', 'cache': ''}
+        self.stages = []
+        self.bytes = None
+        self._start = time.perf_counter()
+        self._stage = None
+
+    def stage(self, name):
+        if self._stage is not None and self._stage[0] == name:
+            return
+        agora = time.perf_counter()
+        if self._stage is not None:
+            self.stages.append((self._stage[0], agora - self._stage[1]))
+        self._stage = (name, agora) if name else None
+
+    def finish(self):
+        self.stage(None)
+        total = time.perf_counter() - self._start
+        branch, cache = self.tags['branch'], self.tags['cache']
+        callback_seconds.observe(total, callback=self.callback, branch=branch, cache=cache)
+        for name, elapsed in self.stages:
+            stage_seconds.observe(elapsed, callback=self.callback, branch=branch, stage=name)
+        if self.bytes is not None:
+            payload_bytes.observe(self.bytes, callback=self.callback, branch=branch)
+        if SLOW_REQUEST_MS and total * 1000 >= SLOW_REQUEST_MS:
+            slow_log.warning(json.dumps({
+                'callback': self.callback, 'ms': round(total * 1000, 1), **self.tags,
+                'stages_ms': {name: round(elapsed * 1000, 1) for name, elapsed in self.stages},
+                'bytes': self.bytes
+            }, default=str))
+
+
+_current = contextvars.ContextVar('f1_trace', default=None)
+
+
+def traced(callback):
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            trace = Trace(callback)
+            token = _current.set(trace)
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                _current.reset(token)
+                trace.finish()
+        return wrapper
+    return decorator
+
+
+def stage(name):
+    # fecha o estágio aberto do callback atual e abre o próximo; fora de um callback não faz nada
+    trace = _current.get()
+    if trace is not None:
+        trace.stage(name)
+
+
+def tag(**tags):
+    trace = _current.get()
+    if trace is not None:
+        trace.tags.update(tags)
+
+
+def set_payload(payload):
+    # aceita o JSON já serializado ou o próprio objeto (serializado só para medir)
+    trace = _current.get()
+    if trace is None:
+        return
+    if not isinstance(payload, (str, bytes)):
+        payload = json.dumps(payload, default=str)
+    trace.bytes = len(payload)
+
+
+def render():
+    lines = []
+    for histogram in HISTOGRAMS:
+        lines.extend(histogram.render())
+    for prefix, stats_fn in _gauge_sources.items():
+        for name, value in stats_fn().items():
+            if not isinstance(value, (int, float)):
+                continue
+            if name in COUNTER_STATS:
+                lines.append(f"# TYPE f1_{prefix}_{name}_total counter")
+                lines.append(f"f1_{prefix}_{name}_total {value}")
+            else:
+                lines.append(f"# TYPE f1_{prefix}_{name} gauge")
+                lines.append(f"f1_{prefix}_{name} {value}")
+    return '\n'.join(lines) + '\n'
+
+
+def metrics_view():
+    return render(), 200, {'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'}
@@ -0,0 +1,112 @@
+import threading
+
+import pandas as pd
+
+from sessions import get_fastf1
+
+# nome da sessão nas colunas Session1..5 do calendário -> identificador aceito pelo get_session;
+# a posição não serve: no fim de semana com sprint a Session2 é a classificação da sprint
+SESSION_NAMES = {
+    'Practice 1': 'FP1', 'Practice 2': 'FP2', 'Practice 3': 'FP3', 'Qualifying': 'Q',
+    'Sprint Shootout': 'SS', 'Sprint Qualifying': 'SQ', 'Sprint': 'S', 'Race': 'R'
+}
+SESSION_DURATION = pd.Timedelta(hours=2)
+# depois disso os dados da sessão no fastf1 são considerados definitivos
+SESSION_FINAL_DELAY = pd.Timedelta(hours=3)
+# mesmo sem nenhuma sessão terminando antes, o calendário de uma temporada em andamento é
+# refeito depois desse tempo para pegar mudanças de data/cancelamentos
+CALENDAR_MAX_TTL = pd.Timedelta(hours=6)
+
+
+class SeasonCalendar:
+    def __init__(self, ano, events, expires_at, ends=None):
+        self.ano = ano
+        self.events = events
+        self.expires_at = expires_at
+        self._by_event = dict(events)
+        self._ends = ends or {}
+
+    def expired(self, agora=None):
+        if self.expires_at is None:
+            return False
+        agora = agora if agora is not None else pd.Timestamp.now(tz='UTC')
+        return agora >= self.expires_at
+
+    def gp_options(self):
+        return [{'label': event, 'value': event} for event, _ in self.events]
+
+    def sessions(self, gp):
+        return self._by_event.get(gp, [])
+
+    def session_options(self, gp):
+        return [{'label': s, 'value': s} for s in self.sessions(gp)]
+
+    def session_end(self, gp, sessao):
+        return self._ends.get((gp, sessao))
+
+
+def _session_end_times(calendar):
+    # {(etapa, sessão): fim}, na ordem do calendário; os testes de pré-temporada não têm
+    # sessões que o get_session aceite e ficam de fora
+    if 'EventFormat' in calendar.columns:
+        calendar = calendar[calendar['EventFormat'] != 'testing']
+    cols = []
+    n = 1
+    while f'Session{n}' in calendar.columns:
+        col = f'Session{n}DateUtc'
+        if col in calendar.columns:
+            dates = pd.to_datetime(calendar[col]).dt.tz_localize('UTC')
+        else:
+            dates = pd.to_datetime(calendar[f'Session{n}Date'], utc=True)
+        cols.append((calendar[f'Session{n}'].map(SESSION_NAMES), dates + SESSION_DURATION))
+        n += 1
+    ends = {}
+    for i, gp in enumerate(calendar['EventName']):
+        for sessoes, dates in cols:
+            if isinstance(sessoes.iat[i], str) and not pd.isnull(dates.iat[i]):
+                ends[(gp, sessoes.iat[i])] = dates.iat[i]
+    return ends
+
+
+def build_season_calendar(ano, calendar=None, agora=None):
+    if calendar is None:
+        calendar = get_fastf1().get_event_schedule(ano)
+    agora = agora if agora is not None else pd.Timestamp.now(tz='UTC')
+    ends = _session_end_times(calendar)
+    by_event = {}
+    for (gp, sessao), end in ends.items():
+        if end < agora:
+            by_event.setdefault(gp, []).append(sessao)
+    events = list(by_event.items())
+
+    next_end = min((end for end in ends.values() if end >= agora), default=None)
+    expires_at = None if next_end is None else min(next_end, agora + CALENDAR_MAX_TTL)
+    return SeasonCalendar(ano, events, expires_at, ends)
+
+
+_calendars = {}
+_calendars_lock = threading.Lock()
+
+
+def get_season_calendar(ano):
+    ano = int(ano)
+    with _calendars_lock:
+        cal = _calendars.get(ano)
+    if cal is not None and not cal.expired():
+        return cal
+    cal = build_season_calendar(ano)
+    with _calendars_lock:
+        _calendars[ano] = cal
+    return cal
+
+
+def calendar_cached(ano):
+    # se o get_season_calendar vai servir o calendário da memória, sem refazer o índice
+    with _calendars_lock:
+        cal = _calendars.get(int(ano))
+    return cal is not None and not cal.expired()
+
+
+def session_is_final(ano, gp, sessao):
+    end = get_season_calendar(ano).session_end(gp, sessao)
+    return end is not None and pd.Timestamp.now(tz='UTC') >= end + SESSION_FINAL_DELAY
@@ -0,0 +1,173 @@
+import json
+import math
+import os
+import threading
+
+import pandas as pd
+
+import lapstore
+from aggregations import best_laps_per_driver, top_n_laps
+from schedule import get_season_calendar, session_is_final
+from sessions import (FASTF1_CACHE_DIR, LOAD_WORKERS, PROFILE_LAPS, PROFILE_LAPS_RCM, SESSION_LOAD_TIMEOUT,
+                      file_lock, iter_load_sessions, load_artifacts, single_flight)
+
+# tabela materializada da temporada com as voltas que entram na força das equipes: top-5 de cada
+# piloto em cada treino livre e a melhor volta de cada piloto no qualify. Cada sessão encerrada é
+# calculada uma única vez e acrescentada; a análise da temporada inteira só lê essa tabela.
+# O top-5 da união dos TL está sempre dentro da união dos top-5 de cada TL, então a métrica por GP
+# sai igual à do power_race.
+SEASON_TABLE_SCHEMA = 2
+SEASON_SESSIONS = ['FP1', 'FP2', 'FP3', 'Q']
+# mesmos perfis do power_race e do power_qualify, para aproveitar o lap store dessas análises
+SESSION_PROFILE = {'FP1': PROFILE_LAPS, 'FP2': PROFILE_LAPS, 'FP3': PROFILE_LAPS, 'Q': PROFILE_LAPS_RCM}
+TOP_N = 5
+TABLE_COLUMNS = ['Ordem', 'EventName', 'Sessao', 'Driver', 'Team', 'LapTime_s']
+# gravadas como dicionário no Arrow: a tabela da temporada inteira fica na casa das dezenas de KB
+TABLE_CATEGORIES = ['EventName', 'Sessao', 'Driver', 'Team']
+# grava a tabela a cada tantas sessões novas, para não perder tudo se o processo cair no meio
+FLUSH_EVERY = 8
+
+_tables = {}
+_tables_lock = threading.Lock()
+
+
+def table_path(ano):
+    return os.path.join(lapstore.LAP_STORE_DIR, lapstore.store_version(), str(int(ano)),
+                        f"season_v{SEASON_TABLE_SCHEMA}.arrow")
+
+
+def _empty_table():
+    return pd.DataFrame({col: pd.Series(dtype=object) for col in TABLE_COLUMNS})
+
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except OSError:
+        return None
+
+
+def read_season(ano):
+    # (tabela, sessões já calculadas); relê o arquivo só quando outro worker o atualizou
+    ano = int(ano)
+    path = table_path(ano)
+    mtime = _mtime(path)
+    with _tables_lock:
+        cached = _tables.get(ano)
+    if cached is not None and cached[0] == mtime:
+        return cached[1], cached[2]
+    table = lapstore.read_table(path) if mtime is not None else None
+    if table is None:
+        return _empty_table(), set()
+    meta = table.schema.metadata or {}
+    done = {tuple(item) for item in json.loads(meta.get(b'sessions', b'[]'))}
+    df = table.to_pandas()
+    with _tables_lock:
+        _tables[ano] = (mtime, df, done)
+    return df, done
+
+
+def _write_season(ano, df, done):
+    path = table_path(ano)
+    meta = {b'sessions': json.dumps(sorted(done)).encode()}
+    df = df.astype({col: 'category' for col in TABLE_CATEGORIES})
+    # sem pyarrow a tabela fica só na memória deste processo
+    mtime = _mtime(path) if lapstore.write_table(path, df, meta) else None
+    with _tables_lock:
+        _tables[int(ano)] = (mtime, df, done)
+
+
+def pending_sessions(ano):
+    # sessões encerradas que ainda não entraram na tabela, com a ordem da etapa no calendário
+    _, done = read_season(ano)
+    pending = []
+    for ordem, (gp, sessoes) in enumerate(get_season_calendar(ano).events):
+        for sessao in SEASON_SESSIONS:
+            if sessao in sessoes and (gp, sessao) not in done and session_is_final(ano, gp, sessao):
+                pending.append((ordem, gp, sessao))
+    return pending
+
+
+def session_rows(ordem, gp, sessao, laps):
+    if laps.empty:
+        return _empty_table()
+    rows = best_laps_per_driver(laps) if sessao == 'Q' else top_n_laps(laps, TOP_N)
+    rows = rows[['Driver', 'Team', 'LapTime_s']].assign(Ordem=ordem, EventName=gp, Sessao=sessao)
+    return rows[TABLE_COLUMNS]
+
+
+def _append(table, novas):
+    novas = [rows for rows in novas if not rows.empty]
+    if not novas:
+        return table
+    return pd.concat([table, *novas], ignore_index=True) if not table.empty else pd.concat(novas, ignore_index=True)
+
+
+def _load(ano, gp, sessao, profile):
+    return load_artifacts(ano, gp, sessao, SESSION_PROFILE[sessao])
+
+
+def _missing_session(erro):
+    # mesma mensagem do fastf1.get_session para um tipo de sessão que o evento não tem
+    return isinstance(erro, ValueError) and 'does not exist for this event' in str(erro)
+
+
+def _update(ano, report):
+    with file_lock(os.path.join(FASTF1_CACHE_DIR, 'locks', f"season_{int(ano)}.lock")):
+        # outro worker pode ter atualizado a tabela enquanto esperávamos o lock
+        pending = pending_sessions(ano)
+        if not pending:
+            return
+        table, done = read_season(ano)
+        ordem = {(gp, sessao): o for o, gp, sessao in pending}
+        keys = [(ano, gp, sessao) for _, gp, sessao in pending]
+        timeout = SESSION_LOAD_TIMEOUT * math.ceil(len(keys) / LOAD_WORKERS)
+        novas, feitas = [], set()
+        for n, (key, artifacts, erro) in enumerate(
+                iter_load_sessions(keys, PROFILE_LAPS, timeout, loader=_load), start=1):
+            if report is not None:
+                report(n / len(keys), f"{n} de {len(keys)} sessões novas da temporada")
+            _, gp, sessao = key
+            if erro is not None:
+                if not _missing_session(erro):
+                    # falha de carga é transitória: a sessão continua pendente para a próxima vez
+                    continue
+                # o fastf1 diz que a etapa não tem essa sessão: conta como feita, sem voltas
+            else:
+                novas.append(session_rows(ordem[(gp, sessao)], gp, sessao, artifacts.laps))
+            feitas.add((gp, sessao))
+            if len(feitas) % FLUSH_EVERY == 0:
+                table, done, novas = _append(table, novas), done | feitas, []
+                _write_season(ano, table, done)
+        if novas or feitas - done:
+            _write_season(ano, _append(table, novas), done | feitas)
+
+
+def update_season(ano, report=None):
+    # acrescenta à tabela só as sessões encerradas desde a última atualização
+    if pending_sessions(ano):
+        single_flight(('season', int(ano)), lambda: _update(ano, report))
+    return read_season(ano)[0]
+
+
+def season_complete(ano):
+    cal = get_season_calendar(ano)
+    return cal.expires_at is None and not pending_sessions(ano)
+
+
+def _gaps(rows, metrica):
+    # mesma conta do team_gaps, para todas as etapas de uma vez
+    teams = rows.groupby(['Ordem', 'EventName', 'Team'], observed=True, sort=True)['LapTime_s'].mean().reset_index()
+    teams['Gap_lider'] = teams['LapTime_s'] - teams.groupby('Ordem')['LapTime_s'].transform('min')
+    return teams.assign(Metrica=metrica)
+
+
+def team_pace_by_event(table):
+    # gap de cada equipe para a melhor, etapa por etapa: ritmo de corrida (top-5 de cada piloto
+    # somando os TL, como no power_race) e qualify (melhor volta de cada piloto)
+    treinos = table[table['Sessao'].isin(['FP1', 'FP2', 'FP3'])].sort_values('LapTime_s', kind='stable')
+    treinos = treinos.groupby(['Ordem', 'Driver'], observed=True, sort=False).head(TOP_N)
+    ritmo = pd.concat([_gaps(treinos, 'Corrida (TL)'), _gaps(table[table['Sessao'] == 'Q'], 'Qualify')],
+                      ignore_index=True)
+    ritmo = ritmo.astype({'Team': object, 'EventName': object})
+    return ritmo[['Team', 'LapTime_s', 'Gap_lider', 'Ordem', 'EventName', 'Metrica']]
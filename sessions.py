@@ -0,0 +1,337 @@
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FuturesTimeout, as_completed
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+import lapstore
+from aggregations import SessionArtifacts, compact_laps
+
+FASTF1_CACHE_DIR = os.environ.get('F1_FASTF1_CACHE_DIR', './fastf1_cache')
+SESSION_CACHE_MAX_MB = int(os.environ.get('F1_SESSION_CACHE_MB', '1024'))
+LOAD_WORKERS = int(os.environ.get('F1_LOAD_WORKERS', '4'))
+SESSION_LOAD_TIMEOUT = float(os.environ.get('F1_SESSION_LOAD_TIMEOUT', '60'))
+
+# partes do Session.load() do fastf1; cada análise declara só as que lê
+LOAD_PARTS = ('laps', 'telemetry', 'weather', 'messages')
+PROFILE_LAPS = frozenset({'laps'})
+# as mensagens da direção de prova marcam voltas deletadas (coluna Deleted), que o pick_fastest respeita
+PROFILE_LAPS_RCM = frozenset({'laps', 'messages'})
+# telemetria de carro: a sessão completa do fastf1 fica no cache (o lap store só guarda voltas)
+PROFILE_TELEMETRY = frozenset({'laps', 'messages', 'telemetry'})
+PROFILE_FULL = frozenset(LOAD_PARTS)
+
+
+_fastf1 = None
+_fastf1_lock = threading.Lock()
+
+
+def get_fastf1():
+    # import adiado: o fastf1 leva quase 1 s para importar e só é preciso quando algo sai do
+    # cache/lap store; o cache em disco é ligado junto, uma vez por processo
+    global _fastf1
+    with _fastf1_lock:
+        if _fastf1 is None:
+            import fastf1
+            os.makedirs(FASTF1_CACHE_DIR, exist_ok=True)
+            fastf1.Cache.enable_cache(FASTF1_CACHE_DIR)
+            _fastf1 = fastf1
+    return _fastf1
+
+
+def session_key(ano, gp, sessao):
+    return (int(ano), str(gp), str(sessao))
+
+
+def _frame_bytes(df):
+    if df is None:
+        return 0
+    try:
+        return int(df.memory_usage(deep=True).sum())
+    except Exception:
+        return 0
+
+
+def estimate_session_bytes(session):
+    total = 0
+    for attr in ('_laps', '_results', '_weather_data', '_race_control_messages', '_session_status'):
+        total += _frame_bytes(getattr(session, attr, None))
+    for attr in ('_car_data', '_pos_data'):
+        for df in (getattr(session, attr, None) or {}).values():
+            total += _frame_bytes(df)
+    return total
+
+
+class SessionCache:
+    def __init__(self, max_bytes):
+        self.max_bytes = max_bytes
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.bytes_used = 0
+
+    def get(self, key):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[0], entry[2]
+
+    def peek(self, key):
+        # igual ao get, mas sem mexer na ordem do LRU nem nos contadores
+        with self._lock:
+            entry = self._entries.get(key)
+            return None if entry is None else (entry[0], entry[2])
+
+    def artifacts(self, key, session):
+        # derivados da entrada atual; uma entrada nova (recarga, top-up) começa com derivados vazios
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None and entry[0] is session:
+                return entry[3]
+        return SessionArtifacts(session)
+
+    def put(self, key, session, parts):
+        size = estimate_session_bytes(session)
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old is not None:
+                self.bytes_used -= old[1]
+            artifacts = SessionArtifacts(session) if 'laps' in parts else None
+            self._entries[key] = (session, size, frozenset(parts), artifacts)
+            self.bytes_used += size
+            # o item recém-inserido nunca é descartado, mesmo se sozinho estourar o orçamento
+            while self.bytes_used > self.max_bytes and len(self._entries) > 1:
+                _, (_, old_size, _, _) = self._entries.popitem(last=False)
+                self.bytes_used -= old_size
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.bytes_used = 0
+
+    def stats(self):
+        with self._lock:
+            return {
+                'entries': len(self._entries), 'bytes': self.bytes_used, 'max_bytes': self.max_bytes,
+                'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions
+            }
+
+
+session_cache = SessionCache(SESSION_CACHE_MAX_MB * 1024 * 1024)
+
+
+class StoredSession:
+    # sessão só com as voltas em formato compacto (lap store ou fastf1 carregado só com voltas)
+    def __init__(self, laps):
+        self._laps = laps
+
+    @property
+    def laps(self):
+        return self._laps
+
+
+def _load_parts(session, parts):
+    session.load(**{part: part in parts for part in LOAD_PARTS})
+
+
+class _Flight:
+    def __init__(self):
+        self.done = threading.Event()
+        self.error = None
+
+
+_inflight = {}
+_inflight_lock = threading.Lock()
+
+
+def single_flight(key, fn):
+    # chamadas concorrentes com a mesma key esperam a que já está rodando em vez de repetir o trabalho;
+    # devolve True para quem executou fn e False para quem só esperou (e deve reler o resultado do cache)
+    with _inflight_lock:
+        flight = _inflight.get(key)
+        leader = flight is None
+        if leader:
+            flight = _inflight[key] = _Flight()
+    if not leader:
+        flight.done.wait()
+        if flight.error is not None:
+            raise flight.error
+        return False
+    try:
+        fn()
+    except BaseException as exc:
+        flight.error = exc
+        raise
+    finally:
+        with _inflight_lock:
+            _inflight.pop(key, None)
+        flight.done.set()
+    return True
+
+
+def _lock_path(key):
+    name = re.sub(r'[^0-9A-Za-z]+', '_', '-'.join(map(str, key))).strip('_').lower()
+    return os.path.join(FASTF1_CACHE_DIR, 'locks', f"{name}.lock")
+
+
+class file_lock:
+    # lock exclusivo entre processos (workers do gunicorn) sobre um arquivo no diretório do cache
+    def __init__(self, path):
+        self.path = path
+        self._fh = None
+
+    def __enter__(self):
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        self._fh = open(self.path, 'a+b')
+        if fcntl is not None:
+            fcntl.flock(self._fh.fileno(), fcntl.LOCK_EX)
+        else:
+            self._fh.seek(0)
+            while True:
+                try:
+                    msvcrt.locking(self._fh.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+        return self
+
+    def __exit__(self, *exc):
+        try:
+            if fcntl is not None:
+                fcntl.flock(self._fh.fileno(), fcntl.LOCK_UN)
+            else:
+                self._fh.seek(0)
+                msvcrt.locking(self._fh.fileno(), msvcrt.LK_UNLCK, 1)
+        finally:
+            self._fh.close()
+            self._fh = None
+
+
+def _fill_cache(key, profile):
+    cached = session_cache.peek(key)
+    if cached is not None:
+        session, loaded = cached
+        missing = profile - loaded
+        if not missing:
+            return
+        if not isinstance(session, StoredSession):
+            # completa a sessão em cache carregando só o que falta
+            with file_lock(_lock_path(key)):
+                _load_parts(session, missing)
+            session_cache.put(key, session, loaded | missing)
+            return
+        profile = profile | loaded
+    if profile <= PROFILE_LAPS_RCM:
+        laps = lapstore.read_laps(key, profile)
+        if laps is not None:
+            session_cache.put(key, StoredSession(laps), profile)
+            return
+    with file_lock(_lock_path(key)):
+        # outro worker pode ter gerado o lap store enquanto esperávamos o lock
+        if profile <= PROFILE_LAPS_RCM:
+            laps = lapstore.read_laps(key, profile)
+            if laps is not None:
+                session_cache.put(key, StoredSession(laps), profile)
+                return
+        session = get_fastf1().get_session(*key)
+        _load_parts(session, profile)
+        if 'laps' in profile:
+            try:
+                lapstore.write_laps(key, session.laps, profile & PROFILE_LAPS_RCM)
+            except Exception:
+                pass
+        if profile <= PROFILE_LAPS_RCM:
+            # ninguém vai ler telemetria desta sessão: guarda só as voltas compactas no cache
+            session = StoredSession(compact_laps(session.laps))
+    session_cache.put(key, session, profile)
+
+
+def load_session(ano, gp, sessao, profile=PROFILE_FULL):
+    key = session_key(ano, gp, sessao)
+    profile = frozenset(profile)
+    while True:
+        cached = session_cache.get(key)
+        if cached is not None and profile <= cached[1]:
+            return cached[0]
+        single_flight(key, lambda: _fill_cache(key, profile))
+        # quem só esperou relê o cache; se a carga do outro não cobriu o perfil, tenta de novo
+        cached = session_cache.peek(key)
+        if cached is not None and profile <= cached[1]:
+            return cached[0]
+
+
+def load_artifacts(ano, gp, sessao, profile=PROFILE_LAPS):
+    session = load_session(ano, gp, sessao, profile | PROFILE_LAPS)
+    return session_cache.artifacts(session_key(ano, gp, sessao), session)
+
+
+_load_pool = None
+_load_pool_lock = threading.Lock()
+
+
+def get_load_pool():
+    global _load_pool
+    with _load_pool_lock:
+        if _load_pool is None:
+            _load_pool = ThreadPoolExecutor(max_workers=LOAD_WORKERS, thread_name_prefix='f1-load')
+        return _load_pool
+
+
+def _reset_load_pool():
+    # com gunicorn --preload o pool criado no master (warm.py) chega ao worker sem as threads,
+    # e o que fosse submetido a ele nunca rodaria; cada processo filho cria o seu
+    global _load_pool, _load_pool_lock
+    _load_pool = None
+    _load_pool_lock = threading.Lock()
+
+
+os.register_at_fork(after_in_child=_reset_load_pool)
+
+
+def load_sessions(keys, profile=PROFILE_FULL, timeout=SESSION_LOAD_TIMEOUT, loader=load_session):
+    # carrega várias sessões em paralelo e devolve ({key: resultado}, {key: erro}) na ordem de keys.
+    # O timeout vale por sessão; uma carga que estoura continua em segundo plano e entra no cache
+    # quando terminar.
+    pool = get_load_pool()
+    keys = [session_key(*k) for k in keys]
+    futures = [(key, time.monotonic() + timeout, pool.submit(loader, *key, profile)) for key in keys]
+    results, errors = {}, {}
+    for key, deadline, future in futures:
+        try:
+            results[key] = future.result(timeout=max(0, deadline - time.monotonic()))
+        except Exception as exc:
+            errors[key] = exc
+    return results, errors
+
+
+def iter_load_sessions(keys, profile=PROFILE_FULL, timeout=SESSION_LOAD_TIMEOUT, loader=load_session):
+    # como load_sessions, mas entrega (key, resultado, erro) na ordem em que as cargas terminam,
+    # para quem quer mostrar algo assim que a primeira sessão chega
+    pool = get_load_pool()
+    futures = {pool.submit(loader, *key, profile): key for key in (session_key(*k) for k in keys)}
+    pendentes = dict(futures)
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            key = pendentes.pop(future)
+            try:
+                yield key, future.result(), None
+            except Exception as exc:
+                yield key, None, exc
+    except FuturesTimeout as exc:
+        # as que estouraram continuam em segundo plano e entram no cache quando terminarem
+        for key in pendentes.values():
+            yield key, None, exc
@@ -0,0 +1,64 @@
+import os
+
+import numpy as np
+
+# cada volta é reamostrada numa grade de fração da volta (0..1, ~3 m por ponto num circuito de 5-7 km),
+# o que deixa voltas de pilotos diferentes no mesmo eixo de distância; depois do LTTB cada traço
+# fica com F1_TELEMETRY_POINTS pontos (~1 por pixel na largura do gráfico)
+GRID_POINTS = 2000
+TRACE_POINTS = int(os.environ.get('F1_TELEMETRY_POINTS', '400'))
+CHANNELS = ['Speed', 'Throttle', 'Brake']
+
+
+def align_to_grid(distance, channels, points=GRID_POINTS):
+    # interpola todos os canais de uma vez: posição de cada ponto da grade entre as amostras
+    # (searchsorted) e pesos calculados uma vez só, aplicados à matriz canal x amostra
+    distance = np.maximum.accumulate(np.nan_to_num(np.asarray(distance, dtype='float64')))
+    valores = np.vstack([np.asarray(v, dtype='float64') for v in channels.values()])
+    length = float(distance[-1])
+    frac = distance / length
+    grid = np.linspace(0.0, 1.0, points)
+    hi = np.clip(np.searchsorted(frac, grid, side='right'), 1, len(frac) - 1)
+    lo = hi - 1
+    passo = frac[hi] - frac[lo]
+    peso = np.clip(np.divide(grid - frac[lo], passo, out=np.zeros_like(grid), where=passo > 0), 0, 1)
+    alinhado = valores[:, lo] * (1 - peso) + valores[:, hi] * peso
+    return {'length': length, **{nome: alinhado[i].astype('float32') for i, nome in enumerate(channels)}}
+
+
+def align_lap(session, driver, lap_number):
+    # telemetria de carro de uma volta na grade de distância; None se a volta não existir
+    laps = session.laps
+    lap = laps[(laps['Driver'] == driver) & (laps['LapNumber'] == lap_number)]
+    if lap.empty:
+        return None
+    tel = lap.iloc[0].get_car_data().add_distance()
+    if len(tel) < 2:
+        return None
+    channels = {nome: tel[nome].astype('float64') for nome in CHANNELS}
+    channels['Brake'] = channels['Brake'] * 100
+    channels['Time'] = tel['Time'].dt.total_seconds()
+    return align_to_grid(tel['Distance'], channels)
+
+
+def lttb(x, y, points=TRACE_POINTS):
+    # Largest-Triangle-Three-Buckets: índices dos pontos que preservam a forma da curva. As médias
+    # dos buckets saem de um reduceat; só a escolha do ponto de cada bucket é sequencial
+    n = len(x)
+    if points >= n or points < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype='float64')
+    y = np.asarray(y, dtype='float64')
+    edges = np.linspace(1, n - 1, points - 1).astype(int)
+    contagem = np.diff(np.append(edges, n - 1))
+    media_x = np.append(np.add.reduceat(x[:n - 1], edges[:-1]) / contagem[:-1], x[-1])
+    media_y = np.append(np.add.reduceat(y[:n - 1], edges[:-1]) / contagem[:-1], y[-1])
+    idx = np.empty(points, dtype=int)
+    idx[0], idx[-1] = 0, n - 1
+    a = 0
+    for i in range(points - 2):
+        lo, hi = edges[i], edges[i + 1]
+        area = np.abs((x[a] - media_x[i + 1]) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (media_y[i + 1] - y[a]))
+        a = lo + int(np.argmax(area))
+        idx[i + 1] = a
+    return idx
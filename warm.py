@@ -0,0 +1,85 @@
+# Pré-aquece os caches antes do app atender: calendário da temporada atual (e da anterior) e as
+# sessões da última etapa disputada, carregadas em paralelo com os derivados já calculados.
+#
+#   python warm.py [--ano 2025] [--timeout 120]
+#
+# Com F1_WARM_ON_BOOT=1 o app.create_app() chama warm_caches() antes de montar o app.
+import argparse
+import logging
+import time
+
+import pandas as pd
+
+from schedule import get_season_calendar
+from sessions import PROFILE_LAPS_RCM, SESSION_LOAD_TIMEOUT, get_load_pool, load_artifacts, load_sessions
+
+log = logging.getLogger('f1analyst')
+
+
+def _timed(fn, *args):
+    inicio = time.perf_counter()
+    return fn(*args), time.perf_counter() - inicio
+
+
+def _warm_artifacts(ano, gp, sessao, profile):
+    artifacts = load_artifacts(ano, gp, sessao, profile)
+    # calcula agora o que as análises pedem, para a primeira requisição só ler do cache
+    artifacts.sector_bests, artifacts.best_laps, artifacts.stints, artifacts.dataset
+    return artifacts
+
+
+def latest_event(calendars):
+    # última etapa com alguma sessão já disputada; no começo do ano cai na temporada anterior
+    for cal in calendars:
+        if cal is not None and cal.events:
+            gp, sessoes = cal.events[-1]
+            return cal.ano, gp, sessoes
+    return None
+
+
+def warm_caches(ano=None, timeout=SESSION_LOAD_TIMEOUT):
+    inicio = time.perf_counter()
+    ano = int(ano or pd.Timestamp.now(tz='UTC').year)
+    pool = get_load_pool()
+    report = {}
+
+    futures = [(temporada, pool.submit(_timed, get_season_calendar, temporada)) for temporada in (ano, ano - 1)]
+    calendars = []
+    for temporada, future in futures:
+        try:
+            cal, elapsed = future.result(timeout=timeout)
+            report[('calendário', temporada)] = elapsed
+            calendars.append(cal)
+        except Exception as exc:
+            log.warning("warm: calendário %s falhou: %s", temporada, exc)
+            calendars.append(None)
+
+    event = latest_event(calendars)
+    if event is not None:
+        temporada, gp, sessoes = event
+        keys = [(temporada, gp, sessao) for sessao in sessoes]
+        results, errors = load_sessions(keys, PROFILE_LAPS_RCM, timeout, loader=lambda *k: _timed(_warm_artifacts, *k))
+        for key, (_, elapsed) in results.items():
+            report[key] = elapsed
+        for key, exc in errors.items():
+            log.warning("warm: sessão %s falhou: %s", key, exc)
+
+    total = time.perf_counter() - inicio
+    log.info("warm: %d itens em %.3f s", len(report), total)
+    return report, total
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--ano', type=int, default=None)
+    parser.add_argument('--timeout', type=float, default=SESSION_LOAD_TIMEOUT)
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    report, total = warm_caches(args.ano, args.timeout)
+    for item, elapsed in report.items():
+        print(f"{' '.join(str(p) for p in item):<40} {elapsed * 1000:8.1f} ms")
+    print(f"{'total':<40} {total * 1000:8.1f} ms")
+
+
+if __name__ == '__main__':
+    main()